@@ -0,0 +1,259 @@
+import json
+import math
+from collections import Counter, OrderedDict
+from pathlib import Path
+
+import connector_registry
+from connector_spec import ConnectorSpec
+
+# Joints whose boards meet at something other than these shapes become "hub"
+# nodes: they are listed in the bill of materials but need a custom part
+HUB = "hub"
+
+# Angular slack (degrees) when deciding if two boards are collinear/perpendicular
+ANGLE_TOLERANCE = 1.0
+
+# Rounding applied to board sections before grouping, so float noise from the
+# structure file does not split identical connectors into separate parts
+PARAM_DIGITS = 4
+
+DEFAULT_SETTINGS = {
+    "board_depth": 50,
+    "wall_thickness": 3,
+    "tolerance": 0.2,
+    "add_taper": False,
+    "add_ribs": False,
+    "add_screw_holes": False,
+}
+
+
+def load_structure(path):
+    """Loads a structure description from a JSON file
+
+    The file holds "nodes" (each with an "id" and a 2D or 3D "position"),
+    "boards" (each with "from", "to", "width" and "thickness") and optional
+    connector settings using the ConnectorGenerator argument names.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def _direction(origin, target):
+    vector = [b - a for a, b in zip(origin, target)]
+    vector += [0.0] * (3 - len(vector))
+    length = math.sqrt(sum(c * c for c in vector))
+    if length == 0:
+        raise ValueError("Board has zero length")
+    return [c / length for c in vector]
+
+
+def _angle_between(u, v):
+    dot = max(-1.0, min(1.0, sum(a * b for a, b in zip(u, v))))
+    return math.degrees(math.acos(dot))
+
+
+def _is_close(angle, target):
+    return abs(angle - target) <= ANGLE_TOLERANCE
+
+
+def classify_joint(directions):
+    """Classifies a joint from the unit directions of the boards leaving it
+
+    Returns one of the built-in connector type names, HUB for anything the generator
+    cannot build, or None for a free board end that needs no connector.
+    """
+    count = len(directions)
+    if count < 2:
+        return None
+
+    angles = {(i, j): _angle_between(directions[i], directions[j])
+              for i in range(count) for j in range(i + 1, count)}
+    opposite = [pair for pair, angle in angles.items() if _is_close(angle, 180)]
+
+    if count == 2:
+        angle = angles[(0, 1)]
+        if _is_close(angle, 180):
+            return "end_to_end"
+        # The corner segment only builds square corners
+        if _is_close(angle, 90):
+            return "angle"
+        return HUB
+
+    if count == 3:
+        if len(opposite) == 1:
+            i, j = opposite[0]
+            k = ({0, 1, 2} - {i, j}).pop()
+            if _is_close(angles[tuple(sorted((i, k)))], 90):
+                return "t_conn"
+        return HUB
+
+    if count == 4:
+        if len(opposite) == 2:
+            (i, j), (k, _) = opposite
+            if _is_close(angles[tuple(sorted((i, k)))], 90):
+                return "cross"
+        return HUB
+
+    return HUB
+
+
+class Part:
+    """One distinct connector in a plan and the joints that use it"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.nodes = []
+
+    @property
+    def connector_type(self):
+        return self.spec.connector_type
+
+    @property
+    def count(self):
+        return len(self.nodes)
+
+    @property
+    def buildable(self):
+        return self.connector_type in connector_registry.registry
+
+    def part_name(self, index):
+        return (f"{self.connector_type}_{index:03d}_"
+                f"{self.spec.board_width:g}x{self.spec.board_thickness:g}")
+
+
+class AssemblyPlan:
+    """The connectors needed for a structure, grouped into distinct parts"""
+
+    def __init__(self, parts, free_ends):
+        self.parts = parts
+        self.free_ends = free_ends
+
+    @property
+    def joint_count(self):
+        return sum(part.count for part in self.parts)
+
+    def counts(self):
+        """Returns the number of joints per connector type"""
+        counts = Counter()
+        for part in self.parts:
+            counts[part.connector_type] += part.count
+        return dict(counts)
+
+    def bill_of_materials(self):
+        """Returns one row per distinct part, suitable for CSV or JSON output"""
+        rows = []
+        for index, part in enumerate(self.parts):
+            row = OrderedDict()
+            row["part"] = part.part_name(index)
+            row["connector_type"] = part.connector_type
+            row["quantity"] = part.count
+            row.update(part.spec.generator_kwargs())
+            row["buildable"] = part.buildable
+            rows.append(row)
+        return rows
+
+    def generate(self, output_dir, file_format="STEP"):
+        """Builds each distinct buildable part once and saves it
+
+        Returns a dict mapping part names to the saved file paths.
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        files = {}
+        for index, part in enumerate(self.parts):
+            if not part.buildable:
+                continue
+            generator = part.spec.generator()
+            segment = generator.create_connector(part.connector_type,
+                                                 **part.spec.type_parameters())
+            name = part.part_name(index)
+            files[name] = generator.save_segment(segment, str(output_dir / name), file_format)
+        return files
+
+
+def plan_structure(structure, **overrides):
+    """Classifies every joint in a structure and groups identical connectors
+
+    Args:
+        structure: Dict with "nodes" and "boards" as described in load_structure
+        **overrides: Connector settings that take precedence over the structure's
+
+    Returns:
+        An AssemblyPlan whose parts are ordered by first appearance
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update({k: v for k, v in structure.items() if k in DEFAULT_SETTINGS})
+    settings.update(overrides)
+
+    positions = {node["id"]: node["position"] for node in structure["nodes"]}
+    joints = {node_id: [] for node_id in positions}
+    for board in structure["boards"]:
+        start, end = board["from"], board["to"]
+        for node_id in (start, end):
+            if node_id not in positions:
+                raise ValueError(f"Board references unknown node: {node_id}")
+        section = (round(float(board["width"]), PARAM_DIGITS),
+                   round(float(board["thickness"]), PARAM_DIGITS))
+        joints[start].append((_direction(positions[start], positions[end]), section))
+        joints[end].append((_direction(positions[end], positions[start]), section))
+
+    parts = OrderedDict()
+    free_ends = []
+    for node_id, boards in joints.items():
+        connector_type = classify_joint([direction for direction, _ in boards])
+        if connector_type is None:
+            free_ends.append(node_id)
+            continue
+
+        # A connector has one slot size, so mixed board sections need a custom hub
+        sections = {section for _, section in boards}
+        if len(sections) > 1:
+            connector_type = HUB
+        section = max(sections)
+
+        spec = ConnectorSpec(section[0], section[1], settings["board_depth"],
+                             settings["wall_thickness"], settings["tolerance"],
+                             settings["add_taper"], settings["add_ribs"],
+                             settings["add_screw_holes"], connector_type=connector_type)
+        if spec not in parts:
+            parts[spec] = Part(spec)
+        parts[spec].nodes.append(node_id)
+
+    return AssemblyPlan(list(parts.values()), free_ends)
+
+
+def main(argv=None):
+    import argparse
+    import csv
+    import sys
+
+    parser = argparse.ArgumentParser(description="Plan the connectors for a board structure")
+    parser.add_argument("structure", help="Structure description (JSON)")
+    parser.add_argument("--bom", help="Write the bill of materials to this CSV file")
+    parser.add_argument("--generate", metavar="DIR",
+                        help="Build each distinct part once into this directory")
+    parser.add_argument("--format", default="STEP", help="Export format for --generate")
+    args = parser.parse_args(argv)
+
+    plan = plan_structure(load_structure(args.structure))
+    rows = plan.bill_of_materials()
+
+    sys.stdout.write(f"{plan.joint_count} joints, {len(plan.parts)} distinct parts, "
+                     f"{len(plan.free_ends)} free ends\n")
+    for connector_type, count in sorted(plan.counts().items()):
+        sys.stdout.write(f"  {connector_type}: {count}\n")
+
+    if args.bom:
+        with open(args.bom, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ["part"])
+            writer.writeheader()
+            writer.writerows(rows)
+
+    if args.generate:
+        for name, path in plan.generate(args.generate, args.format).items():
+            sys.stdout.write(f"Saved {name} to {path}\n")
+
+
+if __name__ == "__main__":
+    main()
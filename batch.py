@@ -0,0 +1,384 @@
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import metrics
+import sandbox as sandbox_module
+from connector_spec import ConnectorSpec
+from file_utils import file_checksum
+
+# Statuses written to the manifest
+STARTED = "started"
+DONE = "done"
+FAILED = "failed"
+CRASHED = "crashed"
+QUARANTINED = "quarantined"
+
+# Failed or crashed attempts before a job is quarantined and no longer retried
+MAX_ATTEMPTS = 3
+
+# Seconds an isolated job may run before it is treated as a crash
+ISOLATED_TIMEOUT = 600
+
+# Isolated jobs a sandbox worker runs before it is replaced
+WORKER_MAX_JOBS = 20
+
+
+class Manifest:
+    """Append-only JSON Lines log of batch job attempts
+
+    Every state change is a new line, so a run that dies at any point leaves
+    a readable manifest; the latest line for a spec hash is its state.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        self.attempts = {}
+        if self.path.exists():
+            self._load()
+
+    def _load(self):
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A run killed mid-write can leave a truncated last line
+                    continue
+                self._track(entry)
+
+    def _track(self, entry):
+        key = entry["spec_hash"]
+        previous = self.entries.get(key)
+        # A "started" line that was never followed up means the process died
+        if (previous is not None and previous["status"] == STARTED
+                and entry["status"] in (STARTED, QUARANTINED)):
+            self.attempts[key] = self.attempts.get(key, 0) + 1
+        if entry["status"] in (FAILED, CRASHED):
+            self.attempts[key] = self.attempts.get(key, 0) + 1
+        self.entries[key] = entry
+
+    def status(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry["status"] == STARTED:
+            return CRASHED
+        return entry["status"]
+
+    def failures(self, key):
+        count = self.attempts.get(key, 0)
+        if self.entries.get(key, {}).get("status") == STARTED:
+            count += 1
+        return count
+
+    def record(self, key, status, **fields):
+        entry = {"spec_hash": key, "status": status, "time": time.time()}
+        entry.update(fields)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._track(entry)
+        return entry
+
+
+def output_path(spec, output_dir):
+    """Returns the file a spec is exported to
+
+    The name holds the geometry digest and the format's extension, so the
+    STEP and STL exports of one part sit side by side.
+    """
+    return (Path(output_dir)
+            / f"{spec.connector_type}_{spec.geometry_digest}.{spec.file_format.lower()}")
+
+
+def _export(spec, output_dir, cache_dir, keep_segment):
+    """Builds and exports a spec, returning (details, segment)
+
+    With a cache hit the part is only built when `keep_segment` asks for
+    the geometry; otherwise segment is None.
+    """
+    target = output_path(spec, output_dir)
+
+    if cache_dir is not None:
+        from export_cache import ExportCache, build_shape
+
+        cache = ExportCache(cache_dir)
+        cached = cache.lookup(spec) is not None
+        # Build outside the export so build and export times mean the same
+        # with or without a cache; a hit only builds when asked for geometry
+        start = time.perf_counter()
+        with metrics.count_boolean_ops() as boolean_ops:
+            segment = build_shape(spec) if keep_segment or not cached else None
+        built = time.perf_counter()
+        cache.export(spec, target, segment)
+        exported = time.perf_counter()
+
+        details = {"output": str(target), "checksum": file_checksum(target), "cached": cached}
+        if segment is not None:
+            details["build_time"] = built - start
+        details.update({
+            "export_time": exported - built,
+            "boolean_ops": boolean_ops["count"],
+            "peak_rss": metrics.peak_rss_bytes(),
+        })
+        return _with_mesh_size(details), segment
+
+    start = time.perf_counter()
+    generator = spec.generator()
+    with metrics.count_boolean_ops() as boolean_ops:
+        segment = generator.create_connector(spec.connector_type, **spec.type_parameters())
+    built = time.perf_counter()
+
+    # Export under a temporary name so a crash never leaves a partial file
+    temporary = generator.save_segment(segment, str(target.parent / f".{target.stem}.tmp"),
+                                       spec.file_format, deterministic=True)
+    os.replace(temporary, target)
+    exported = time.perf_counter()
+
+    return _with_mesh_size({
+        "output": str(target),
+        "checksum": file_checksum(target),
+        "build_time": built - start,
+        "export_time": exported - built,
+        "boolean_ops": boolean_ops["count"],
+        "peak_rss": metrics.peak_rss_bytes(),
+    }), segment
+
+
+def build_and_export(spec, output_dir, cache_dir=None, mesh_store=None):
+    """Builds one spec and exports it atomically
+
+    Args:
+        spec: The ConnectorSpec to build
+        output_dir: Directory the export is written to
+        cache_dir: Optional ExportCache directory; outputs identical to an
+            earlier export become hard links instead of new files
+        mesh_store: Optional MeshStore the part's mesh is added to, unless
+            it already holds one for this geometry
+
+    Returns:
+        Dict with the output path, its checksum, build/export timings, the
+        boolean operation count, this process's peak RSS and, for STL, the
+        triangle count
+    """
+    want_mesh = mesh_store is not None and spec not in mesh_store
+    details, segment = _export(spec, output_dir, cache_dir, want_mesh)
+    if want_mesh:
+        from shm_transport import tessellate
+
+        mesh_store.add(spec, *tessellate(segment))
+    return details
+
+
+def export_with_mesh(spec, output_dir, cache_dir=None):
+    """Sandbox task: build_and_export, also handing the part's mesh back
+    through shared memory
+
+    Returns:
+        (details, shm_transport.ShmHandle)
+    """
+    from shm_transport import put_mesh, tessellate
+
+    details, segment = _export(spec, output_dir, cache_dir, True)
+    return details, put_mesh(*tessellate(segment))
+
+
+def _with_mesh_size(details):
+    if details["output"].endswith(".stl"):
+        triangles = metrics.stl_triangle_count(details["output"])
+        if triangles is not None:
+            details["triangles"] = triangles
+    return details
+
+
+def run_isolated(spec, output_dir, sandbox, cache_dir=None, mesh_store=None):
+    """Runs build_and_export in a sandbox worker so a kernel crash cannot
+    take down the caller
+
+    A mesh for `mesh_store` is passed back in shared memory rather than
+    pickled through the worker's pipe.
+
+    Returns:
+        (status, details) where status is DONE, FAILED or CRASHED
+    """
+    if mesh_store is not None and spec not in mesh_store:
+        from shm_transport import open_mesh
+
+        result = sandbox.run(export_with_mesh, spec, str(output_dir), cache_dir)
+        if result.ok:
+            details, handle = result.value
+            with open_mesh(handle) as (vertices, triangles):
+                mesh_store.add(spec, vertices, triangles)
+            return DONE, details
+    else:
+        result = sandbox.run(build_and_export, spec, str(output_dir), cache_dir)
+        if result.ok:
+            return DONE, result.value
+    details = {"error": f"{result.error_type}: {result.error}" if result.error_type
+               else result.error, "sandbox": result.to_dict()}
+    if result.status == sandbox_module.ERROR:
+        return FAILED, details
+    return CRASHED, details
+
+
+def _add_mesh(spec, mesh_store, log):
+    from shm_transport import tessellate
+
+    try:
+        mesh_store.add(spec, *tessellate(spec.build()))
+    except Exception as e:
+        if log:
+            log(f"{spec.digest} mesh not stored: {type(e).__name__}: {str(e)}")
+
+
+def _is_complete(manifest, key, spec, output_dir):
+    if manifest.status(key) != DONE:
+        return False
+    entry = manifest.entries[key]
+    path = Path(entry["output"])
+    return (path == output_path(spec, output_dir) and path.exists()
+            and file_checksum(path) == entry["checksum"])
+
+
+def run_batch(specs, output_dir, manifest_path=None, max_attempts=MAX_ATTEMPTS,
+              isolate=False, log=None, timeout=ISOLATED_TIMEOUT, memory_limit_mb=None,
+              cache_dir=None, json_log=None, mesh_dir=None):
+    """Generates a batch of connectors, resuming from a previous run's manifest
+
+    Completed jobs whose output still matches the recorded checksum are
+    skipped. Jobs that failed or crashed before are retried in isolated
+    subprocesses, and quarantined once they reach `max_attempts`.
+
+    Args:
+        specs: Iterable of ConnectorSpec
+        output_dir: Directory for the exported files
+        manifest_path: Manifest file (defaults to manifest.jsonl in output_dir)
+        max_attempts: Failures allowed before a job is quarantined
+        isolate: Run every job in a subprocess, not only retries
+        log: Optional callable receiving one progress message per job
+        timeout: Seconds an isolated job may run
+        memory_limit_mb: Memory limit for the isolated worker process
+        cache_dir: Optional ExportCache directory for deduplicated exports
+        json_log: Optional metrics.JsonLog receiving one "job" event per job
+        mesh_dir: Optional MeshStore directory that every built part's mesh
+            is added to, for previews without re-reading the exports
+
+    Every job is also recorded in metrics.METRICS.
+
+    Returns:
+        Dict counting jobs per final status, plus "skipped"
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(manifest_path or output_dir / "manifest.jsonl")
+    summary = {"skipped": 0, DONE: 0, FAILED: 0, CRASHED: 0, QUARANTINED: 0}
+    mesh_store = None
+    if mesh_dir is not None:
+        from mesh_store import MeshStore
+
+        mesh_store = MeshStore(mesh_dir)
+
+    with sandbox_module.Sandbox(timeout, memory_limit_mb, WORKER_MAX_JOBS) as sandbox, \
+            (mesh_store.batch() if mesh_store is not None else nullcontext()):
+        for spec in specs:
+            _run_job(spec, output_dir, manifest, max_attempts, isolate, sandbox, summary, log,
+                     cache_dir, json_log, mesh_store)
+
+    return summary
+
+
+def _run_job(spec, output_dir, manifest, max_attempts, isolate, sandbox, summary, log,
+             cache_dir, json_log, mesh_store):
+    key = spec.digest
+
+    if _is_complete(manifest, key, spec, output_dir):
+        if mesh_store is not None and spec not in mesh_store:
+            # Its mesh was added by a run that died before writing the index
+            _add_mesh(spec, mesh_store, log)
+        summary["skipped"] += 1
+        return
+
+    if manifest.status(key) == QUARANTINED:
+        summary[QUARANTINED] += 1
+        return
+
+    failures = manifest.failures(key)
+    if failures >= max_attempts:
+        manifest.record(key, QUARANTINED, attempt=failures)
+        summary[QUARANTINED] += 1
+        if log:
+            log(f"{key} quarantined after {failures} failed attempts")
+        return
+
+    attempt = failures + 1
+    manifest.record(key, STARTED, attempt=attempt, spec=spec.to_dict())
+    if isolate or failures:
+        status, details = run_isolated(spec, output_dir, sandbox, cache_dir, mesh_store)
+    else:
+        try:
+            status, details = DONE, build_and_export(spec, output_dir, cache_dir, mesh_store)
+        except Exception as e:
+            status, details = FAILED, {"error": f"{type(e).__name__}: {str(e)}"}
+
+    manifest.record(key, status, attempt=attempt, **details)
+    summary[status] += 1
+    metrics.record_job(spec.connector_type, status, details)
+    if json_log:
+        json_log.write("job", spec_hash=key, connector_type=spec.connector_type,
+                       status=status, attempt=attempt, **details)
+    if log:
+        log(f"{key} {status}" + (f": {details['error']}" if "error" in details else ""))
+
+
+def load_specs(path):
+    """Reads ConnectorSpec records from a JSON Lines file"""
+    with open(path) as f:
+        return [ConnectorSpec.from_json(line) for line in f if line.strip()]
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a batch of connectors")
+    parser.add_argument("specs", help="Connector specs, one JSON object per line")
+    parser.add_argument("--output", default="output", help="Output directory")
+    parser.add_argument("--manifest", help="Manifest file (default: OUTPUT/manifest.jsonl)")
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    parser.add_argument("--isolate", action="store_true",
+                        help="Run every job in a sandboxed subprocess")
+    parser.add_argument("--timeout", type=float, default=ISOLATED_TIMEOUT,
+                        help="Seconds an isolated job may run")
+    parser.add_argument("--memory-limit", type=int, metavar="MB",
+                        help="Memory limit for the isolated worker")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="Share identical outputs through an export cache in DIR")
+    parser.add_argument("--mesh-store", metavar="DIR",
+                        help="Add every built part's mesh to a mesh store in DIR")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics on this local port while running")
+    parser.add_argument("--log-json", metavar="FILE",
+                        help="Append one JSON line per job to FILE")
+    args = parser.parse_args(argv)
+
+    if args.metrics_port is not None:
+        metrics.serve(args.metrics_port)
+    json_log = metrics.JsonLog(args.log_json) if args.log_json else None
+    summary = run_batch(load_specs(args.specs), args.output, args.manifest,
+                        args.max_attempts, args.isolate,
+                        log=lambda message: sys.stdout.write(message + "\n"),
+                        timeout=args.timeout, memory_limit_mb=args.memory_limit,
+                        cache_dir=args.cache, json_log=json_log, mesh_dir=args.mesh_store)
+    if json_log:
+        json_log.close()
+    sys.stdout.write(", ".join(f"{count} {status}" for status, count in summary.items()) + "\n")
+    return 0 if not summary[FAILED] and not summary[CRASHED] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,173 @@
+"""Tolerance calibration plates
+
+Builds a single printable plate of small slot coupons that sweeps the slot
+tolerance across columns and the wall thickness across rows. Each coupon
+is a short sleeve sized for a test strip of the real board thickness, with
+its tolerance embossed on top, so one print shows which tolerance gives
+the right fit for a printer/material combination.
+"""
+import cadquery as cq
+
+from connector_models import ConnectorGenerator
+
+# Default sweep, matching the range worth testing on FDM printers
+TOLERANCE_START = 0.0
+TOLERANCE_STOP = 0.6
+TOLERANCE_STEP = 0.05
+
+COUPON_LENGTH = 15   # Length of each sleeve along the slot (mm)
+STRIP_WIDTH = 10     # Width of the test strip cut from the board (mm)
+GAP = 3              # Space between coupons on the plate (mm)
+LABEL_SIZE = 3.5     # Font size of the embossed labels (mm)
+LABEL_HEIGHT = 0.6   # How far labels stand proud of the top face (mm)
+
+
+def tolerance_sweep(start=TOLERANCE_START, stop=TOLERANCE_STOP, step=TOLERANCE_STEP):
+    """Returns the tolerances from start to stop (inclusive) in `step` increments
+
+    Raises:
+        ValueError: If step is not positive or stop is below start
+    """
+    if step <= 0:
+        raise ValueError("Tolerance step must be greater than 0")
+    if stop < start:
+        raise ValueError("Tolerance stop must not be below the start")
+    count = int(round((stop - start) / step)) + 1
+    return [round(start + i * step, 4) for i in range(count)]
+
+
+class CalibrationPlate:
+    """Builds calibration coupons, reusing geometry between variants
+
+    The outer sleeve is built once per wall thickness and each label once
+    per text; only the slot cut is made per coupon.
+    """
+
+    def __init__(self, board_thickness, strip_width=STRIP_WIDTH, coupon_length=COUPON_LENGTH,
+                 label=True):
+        self.board_thickness = board_thickness
+        self.strip_width = strip_width
+        self.coupon_length = coupon_length
+        self.label = label
+        self._templates = {}
+        self._labels = {}
+
+    def _template(self, wall_thickness):
+        """Outer sleeve for a wall thickness, centered on the origin"""
+        if wall_thickness not in self._templates:
+            self._templates[wall_thickness] = (cq.Workplane("XY")
+                .box(self.coupon_length,
+                     self.strip_width + wall_thickness * 2,
+                     self.board_thickness + wall_thickness * 2)
+                .val())
+        return self._templates[wall_thickness]
+
+    def _label(self, text):
+        """Embossed text solid sitting on z=0"""
+        if text not in self._labels:
+            self._labels[text] = (cq.Workplane("XY")
+                .text(text, LABEL_SIZE, LABEL_HEIGHT, combine=False,
+                      halign="center", valign="center")
+                .val())
+        return self._labels[text]
+
+    def size(self, wall_thickness):
+        """Footprint (x, y) of a coupon"""
+        return self.coupon_length, self.strip_width + wall_thickness * 2
+
+    def coupon(self, tolerance, wall_thickness):
+        """Returns one coupon Shape for a tolerance/wall combination"""
+        slot = (cq.Workplane("XY")
+               .box(self.coupon_length * 1.2,  # Longer than the sleeve so it cuts through
+                    self.strip_width + tolerance,
+                    self.board_thickness + tolerance)
+               .val())
+        coupon = self._template(wall_thickness).cut(slot)
+        if self.label:
+            top = self.board_thickness / 2 + wall_thickness
+            coupon = coupon.fuse(self._label(f"{tolerance:.2f}").moved(
+                cq.Location(cq.Vector(0, 0, top))))
+        return coupon
+
+    def row_tab(self, wall_thickness):
+        """Solid tab labelled with the row's wall thickness"""
+        length, width = self.size(wall_thickness)
+        tab = cq.Workplane("XY").box(length, width, 2).translate((0, 0, 1)).val()
+        if self.label:
+            tab = tab.fuse(self._label(f"W{wall_thickness:g}").moved(
+                cq.Location(cq.Vector(0, 0, 2))))
+        return tab
+
+    def build(self, tolerances=None, walls=(3,)):
+        """Lays out every coupon on one plate
+
+        Args:
+            tolerances: Slot tolerances, one per column (defaults to tolerance_sweep())
+            walls: Wall thicknesses, one per row
+
+        Returns:
+            A Workplane holding all coupons as one compound, resting on z=0
+        """
+        if tolerances is None:
+            tolerances = tolerance_sweep()
+
+        solids = []
+        y = 0.0
+        for wall_thickness in walls:
+            length, width = self.size(wall_thickness)
+            z = self.board_thickness / 2 + wall_thickness
+            solids.append(self.row_tab(wall_thickness).moved(
+                cq.Location(cq.Vector(0, y + width / 2, 0))))
+            for column, tolerance in enumerate(tolerances, start=1):
+                x = column * (length + GAP)
+                solids.append(self.coupon(tolerance, wall_thickness).moved(
+                    cq.Location(cq.Vector(x, y + width / 2, z))))
+            y += width + GAP
+
+        return cq.Workplane("XY").newObject([cq.Compound.makeCompound(solids)])
+
+
+def build_calibration_plate(board_thickness, tolerances=None, walls=(3,),
+                            strip_width=STRIP_WIDTH, label=True):
+    """Builds a calibration plate; see CalibrationPlate.build"""
+    return CalibrationPlate(board_thickness, strip_width, label=label).build(tolerances, walls)
+
+
+def save_calibration_plate(plate, filename, file_format="STL"):
+    """Saves a plate to `filename` (without extension) and returns the full name"""
+    # save_segment does not depend on the generator's dimensions
+    return ConnectorGenerator(1, 1, 1).save_segment(plate, filename, file_format,
+                                                    deterministic=True)
+
+
+def main(argv=None):
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Build a tolerance calibration plate")
+    parser.add_argument("--thickness", type=float, required=True, help="Board thickness (mm)")
+    parser.add_argument("--strip-width", type=float, default=STRIP_WIDTH,
+                        help="Width of the test strip (mm)")
+    parser.add_argument("--start", type=float, default=TOLERANCE_START)
+    parser.add_argument("--stop", type=float, default=TOLERANCE_STOP)
+    parser.add_argument("--step", type=float, default=TOLERANCE_STEP)
+    parser.add_argument("--wall", type=float, action="append",
+                        help="Wall thickness for a row; repeat for more rows (default 3)")
+    parser.add_argument("--no-labels", action="store_true")
+    parser.add_argument("--format", default="STL")
+    parser.add_argument("--output", default="calibration_plate",
+                        help="Output file name without extension")
+    args = parser.parse_args(argv)
+    try:
+        tolerances = tolerance_sweep(args.start, args.stop, args.step)
+    except ValueError as e:
+        parser.error(str(e))
+
+    plate = build_calibration_plate(args.thickness, tolerances,
+                                    args.wall or [3], args.strip_width,
+                                    label=not args.no_labels)
+    sys.stdout.write(f"Saved {save_calibration_plate(plate, args.output, args.format)}\n")
+
+
+if __name__ == "__main__":
+    main()
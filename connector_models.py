@@ -1,5 +1,82 @@
 import cadquery as cq
 import math
+import os
+import threading
+from functools import lru_cache
+
+import connector_registry
+import step_writer
+
+# Levels of detail for create_connector: the finished part, or a quick
+# stand-in for previews and interactive editing (see create_proxy)
+LOD_FULL = "full"
+LOD_PROXY = "proxy"
+
+# Bump whenever a builder change alters the geometry it produces; export
+# caches treat outputs from another version as stale
+GEOMETRY_VERSION = 1
+
+# Proxy shells kept in memory, so toggling features or going back to earlier
+# dimensions does not rebuild them
+PROXY_CACHE_SIZE = 64
+
+_boolean_ops = 0
+_boolean_lock = threading.Lock()
+
+
+def boolean_op_count():
+    """Boolean operations run by generator geometry in this process so far"""
+    return _boolean_ops
+
+
+def _count_boolean_op():
+    global _boolean_ops
+    with _boolean_lock:
+        _boolean_ops += 1
+
+
+class Workplane(cq.Workplane):
+    """cq.Workplane that counts the boolean operations the builders run
+
+    Objects derived from one (translate, rotate, union, ...) are counted too,
+    so builders only need to start from this class. cutEach covers hole(),
+    and extrude/loft count when they combine with an existing solid.
+    """
+
+    def _combines(self, combine):
+        if not combine:
+            return False
+        try:
+            self.findSolid()
+        except ValueError:
+            return False
+        return True
+
+    def extrude(self, until, combine=True, *args, **kwargs):
+        if self._combines(combine):
+            _count_boolean_op()
+        return super().extrude(until, combine, *args, **kwargs)
+
+    def loft(self, ruled=False, combine=True, *args, **kwargs):
+        if self._combines(combine):
+            _count_boolean_op()
+        return super().loft(ruled, combine, *args, **kwargs)
+
+    def union(self, *args, **kwargs):
+        _count_boolean_op()
+        return super().union(*args, **kwargs)
+
+    def cut(self, *args, **kwargs):
+        _count_boolean_op()
+        return super().cut(*args, **kwargs)
+
+    def intersect(self, *args, **kwargs):
+        _count_boolean_op()
+        return super().intersect(*args, **kwargs)
+
+    def cutEach(self, *args, **kwargs):
+        _count_boolean_op()
+        return super().cutEach(*args, **kwargs)
 
 class ConnectorGenerator:
     def __init__(self, board_width, board_thickness, board_depth, 
@@ -18,12 +95,12 @@ class ConnectorGenerator:
         """Creates a slot for the board with optional taper"""
         slot_width = self.board_width + self.tolerance
         slot_height = self.board_thickness + self.tolerance
-        slot = cq.Workplane("XY").box(length, slot_width, slot_height)
+        slot = Workplane("XY").box(length, slot_width, slot_height)
 
         if self.add_taper and with_taper:
             # Add a 45-degree taper at the entrance
             taper_depth = min(2, length/4)  # Limit taper depth
-            taper = (cq.Workplane("XY")
+            taper = (Workplane("XY")
                     .wedge(taper_depth, 
                           slot_width,    # ymin: width at base
                           slot_width + 2,  # ymax: width at tip
@@ -68,7 +145,7 @@ class ConnectorGenerator:
 
         for i in range(num_ribs):
             pos = length * (i + 1)/(num_ribs + 1) - length/2
-            rib = (cq.Workplane("XY")
+            rib = (Workplane("XY")
                   .box(rib_thickness, width, height))
             workplane = workplane.union(rib.translate((pos, 0, 0)))
 
@@ -82,11 +159,11 @@ class ConnectorGenerator:
         connector_height = self.board_thickness + (self.wall_thickness * 2)  # Add walls top/bottom
         
         # Create outer shell
-        result = (cq.Workplane("XY")
+        result = (Workplane("XY")
                  .box(connector_length, connector_width, connector_height))
         
         # Create slot (slightly larger than board for tolerance)
-        slot = (cq.Workplane("XY")
+        slot = (Workplane("XY")
                .box(connector_length + self.tolerance,
                    self.board_width + self.tolerance,
                    self.board_thickness + self.tolerance))
@@ -99,7 +176,7 @@ class ConnectorGenerator:
             taper_depth = min(2, self.wall_thickness)
             
             # Create taper for both ends
-            taper = (cq.Workplane("XY")
+            taper = (Workplane("XY")
                     .wedge(taper_depth,  # xlen (depth)
                           self.board_width + self.tolerance,    # ymin: width at base
                           self.board_width + self.tolerance + 1,  # ymax: width at tip
@@ -114,7 +191,7 @@ class ConnectorGenerator:
         if self.add_ribs:
             # Add reinforcement ribs
             rib_thickness = min(1.5, self.wall_thickness/2)  # Thinner ribs
-            rib = (cq.Workplane("XY")
+            rib = (Workplane("XY")
                   .box(rib_thickness, connector_width, connector_height))
             
             # Add three ribs for better support
@@ -155,17 +232,17 @@ class ConnectorGenerator:
         corner_size = board_height  # Size of the solid corner
         
         # Create base of L shape with extended arms to accommodate the solid corner
-        result = (cq.Workplane("XY")
+        result = (Workplane("XY")
                  # Create horizontal section (extended by corner_size)
                  .box(board_length + corner_size, board_height, board_width)
                  .translate(((board_length + corner_size)/2, board_height/2, board_width/2))
                  # Create vertical section (extended by corner_size)
-                 .union(cq.Workplane("XY")
+                 .union(Workplane("XY")
                        .box(board_height, board_length + corner_size, board_width)
                        .translate((board_height/2, (board_length + corner_size)/2, board_width/2))))
         
         # Create horizontal channel (stops at corner)
-        h_channel = (cq.Workplane("XY")
+        h_channel = (Workplane("XY")
                     .box(board_length,  # Original length
                         self.board_thickness,  # Board thickness
                         self.board_width)  # Board width
@@ -177,7 +254,7 @@ class ConnectorGenerator:
         result = result.cut(h_channel)
         
         # Create vertical channel (stops at corner)
-        v_channel = (cq.Workplane("XY")
+        v_channel = (Workplane("XY")
                     .box(self.board_thickness,  # Board thickness
                         board_length,  # Original length
                         self.board_width)  # Board width
@@ -193,7 +270,7 @@ class ConnectorGenerator:
             taper_depth = min(2, self.wall_thickness)
             
             # Create horizontal taper
-            h_taper = (cq.Workplane("XY")
+            h_taper = (Workplane("XY")
                       .box(taper_depth, self.board_thickness + 2, board_width)
                       .faces(">X")
                       .workplane()
@@ -206,7 +283,7 @@ class ConnectorGenerator:
             result = result.cut(h_taper)
             
             # Create vertical taper
-            v_taper = (cq.Workplane("XY")
+            v_taper = (Workplane("XY")
                       .box(self.board_thickness + 2, taper_depth, board_width)
                       .faces(">Y")
                       .workplane()
@@ -223,7 +300,7 @@ class ConnectorGenerator:
             rib_thickness = min(1.5, self.wall_thickness/2)
             
             # Create horizontal rib
-            h_rib = (cq.Workplane("XY")
+            h_rib = (Workplane("XY")
                     .box(rib_thickness, board_height, board_width)
                     .translate(((board_length + corner_size) * 0.75, board_height/2, board_width/2)))
             
@@ -231,7 +308,7 @@ class ConnectorGenerator:
             result = result.union(h_rib)
             
             # Create vertical rib
-            v_rib = (cq.Workplane("XY")
+            v_rib = (Workplane("XY")
                     .box(board_height, rib_thickness, board_width)
                     .translate((board_height/2, (board_length + corner_size) * 0.75, board_width/2)))
             
@@ -269,11 +346,11 @@ class ConnectorGenerator:
         body_height = self.board_thickness + (self.wall_thickness * 2)
         
         # Create main horizontal body
-        result = (cq.Workplane("XY")
+        result = (Workplane("XY")
                  .box(horizontal_length, body_width, body_height))
         
         # Create vertical extension
-        vertical_body = (cq.Workplane("XY")
+        vertical_body = (Workplane("XY")
                        .box(body_width, vertical_length, body_height)
                        .translate((0, body_width/2 + vertical_length/2, 0)))  # Position after horizontal body
         
@@ -285,13 +362,13 @@ class ConnectorGenerator:
         slot_height = self.board_thickness + self.tolerance
         
         # Horizontal slot through entire length
-        h_slot = (cq.Workplane("XY")
+        h_slot = (Workplane("XY")
                  .box(horizontal_length + self.tolerance,
                      slot_width,
                      slot_height))
         
         # Vertical slot - only in vertical section
-        v_slot = (cq.Workplane("XY")
+        v_slot = (Workplane("XY")
                  .box(slot_width,
                      vertical_length + self.tolerance,
                      slot_height)
@@ -305,7 +382,7 @@ class ConnectorGenerator:
             taper_depth = min(2, self.wall_thickness)
             
             # Horizontal tapers
-            h_taper = (cq.Workplane("XY")
+            h_taper = (Workplane("XY")
                       .wedge(taper_depth,  # xlen (depth)
                             slot_width,    # ymin (base width)
                             slot_width + 1,  # ymax (tip width)
@@ -327,7 +404,7 @@ class ConnectorGenerator:
             rib_thickness = min(1.5, self.wall_thickness/2)  # Thinner ribs
             
             # Horizontal ribs
-            h_rib = (cq.Workplane("XY")
+            h_rib = (Workplane("XY")
                     .box(rib_thickness, body_width, body_height))
             
             # Add three ribs for better support
@@ -337,7 +414,7 @@ class ConnectorGenerator:
                      .union(h_rib.translate((horizontal_length/4, 0, 0))))  # Right quarter
             
             # Vertical rib
-            v_rib = (cq.Workplane("XY")
+            v_rib = (Workplane("XY")
                     .box(body_width, rib_thickness, body_height)
                     .translate((0, body_width/2 + vertical_length/4, 0)))
             result = result.union(v_rib)
@@ -377,7 +454,7 @@ class ConnectorGenerator:
         base_height = self.board_thickness + (self.wall_thickness * 2)
         
         # Create base piece
-        result = (cq.Workplane("XY")
+        result = (Workplane("XY")
                  .box(base_size, base_size, base_height))
         
         # Create slot
@@ -391,7 +468,7 @@ class ConnectorGenerator:
         # Add reinforcement ribs
         if self.add_ribs:
             for angle in [0, 45, 90, 135]:
-                rib = (cq.Workplane("XY")
+                rib = (Workplane("XY")
                       .box(2, base_size, base_height)
                       .rotate((0, 0, 0), (0, 0, 1), angle))
                 result = result.union(rib)
@@ -411,11 +488,11 @@ class ConnectorGenerator:
         connector_height = self.board_thickness + (self.wall_thickness * 2)
         
         # Create outer shell
-        result = (cq.Workplane("XY")
+        result = (Workplane("XY")
                  .box(length, connector_width, connector_height))
         
         # Create slot (slightly larger than board for tolerance)
-        slot = (cq.Workplane("XY")
+        slot = (Workplane("XY")
                .box(length + self.tolerance,
                    self.board_width + self.tolerance,
                    self.board_thickness + self.tolerance))
@@ -428,7 +505,7 @@ class ConnectorGenerator:
             taper_depth = min(2, self.wall_thickness)
             
             # Create taper for entrance
-            taper = (cq.Workplane("XY")
+            taper = (Workplane("XY")
                     .box(taper_depth, 
                         self.board_width + self.tolerance + 2,
                         self.board_thickness + self.tolerance)
@@ -443,7 +520,7 @@ class ConnectorGenerator:
         if self.add_ribs:
             # Add single reinforcement rib in the middle
             rib_thickness = min(1.5, self.wall_thickness/2)
-            rib = (cq.Workplane("XY")
+            rib = (Workplane("XY")
                   .box(rib_thickness, connector_width, connector_height))
             result = result.union(rib)
         
@@ -457,14 +534,16 @@ class ConnectorGenerator:
         
         return result
 
-    def create_corner_segment(self):
+    def create_corner_segment(self, angle=90):
         """Creates a single corner segment for L-shaped connections"""
+        if angle != 90:
+            raise ValueError("Corner segments are only available at 90 degrees")
         # Calculate dimensions
         corner_size = self.board_thickness + (self.wall_thickness * 2)
         connector_width = self.board_width + (self.wall_thickness * 2)
         
         # Create solid corner piece
-        result = (cq.Workplane("XY")
+        result = (Workplane("XY")
                  .box(corner_size, corner_size, connector_width))
         
         # Add slots for both directions
@@ -472,14 +551,14 @@ class ConnectorGenerator:
         slot_height = self.board_thickness + self.tolerance
         
         # Horizontal slot
-        h_slot = (cq.Workplane("XY")
+        h_slot = (Workplane("XY")
                  .box(corner_size * 1.2,  # Make slightly longer to ensure it cuts through
                      slot_width,
                      slot_height)
                  .translate((corner_size/4, 0, 0)))
         
         # Vertical slot
-        v_slot = (cq.Workplane("XY")
+        v_slot = (Workplane("XY")
                  .box(slot_width,
                      corner_size * 1.2,  # Make slightly longer to ensure it cuts through
                      slot_height)
@@ -491,7 +570,7 @@ class ConnectorGenerator:
         if self.add_ribs:
             # Add diagonal reinforcement rib
             rib_thickness = min(1.5, self.wall_thickness/2)
-            rib = (cq.Workplane("XY")
+            rib = (Workplane("XY")
                   .box(rib_thickness, corner_size * 1.4, connector_width)
                   .rotate((0,0,0), (0,0,1), 45)
                   .translate((0, 0, 0)))
@@ -512,13 +591,13 @@ class ConnectorGenerator:
         body_depth = self.board_depth + (self.wall_thickness * 2)  # Depth including walls
         
         # Create main horizontal body
-        result = (cq.Workplane("XY")
+        result = (Workplane("XY")
                  .box(body_depth * 2,  # Long enough for two board depths
                      body_width, 
                      body_height))
         
         # Create vertical extension
-        vertical_body = (cq.Workplane("XY")
+        vertical_body = (Workplane("XY")
                        .box(body_width,  # Width matches main body height
                            body_depth,   # Depth for one board
                            body_height)
@@ -528,13 +607,13 @@ class ConnectorGenerator:
         result = result.union(vertical_body)
         
         # Create horizontal slot through entire length
-        h_slot = (cq.Workplane("XY")
+        h_slot = (Workplane("XY")
                  .box(body_depth * 3,  # Make it extra long to ensure it cuts through
                      slot_width,
                      slot_height))
         
         # Create vertical slot
-        v_slot = (cq.Workplane("XY")
+        v_slot = (Workplane("XY")
                  .box(slot_width,
                      slot_depth * 1.5,  # Make it longer to ensure it cuts through
                      slot_height)
@@ -548,7 +627,7 @@ class ConnectorGenerator:
             
             # Create horizontal tapers at both ends
             for x_pos in [-body_depth - taper_depth/2, body_depth + taper_depth/2]:
-                h_taper = (cq.Workplane("XY")
+                h_taper = (Workplane("XY")
                           .box(taper_depth, 
                               slot_width + 2,
                               slot_height)
@@ -559,7 +638,7 @@ class ConnectorGenerator:
                 result = result.cut(h_taper.translate((x_pos, 0, 0)))
             
             # Create vertical taper at the top
-            v_taper = (cq.Workplane("XY")
+            v_taper = (Workplane("XY")
                       .box(slot_width + 2,
                           taper_depth,
                           slot_height)
@@ -575,13 +654,13 @@ class ConnectorGenerator:
             
             # Add ribs in horizontal section
             for x_pos in [-body_depth/2, 0, body_depth/2]:
-                h_rib = (cq.Workplane("XY")
+                h_rib = (Workplane("XY")
                         .box(rib_thickness, body_width, body_height)
                         .translate((x_pos, 0, 0)))
                 result = result.union(h_rib)
             
             # Add rib in vertical section
-            v_rib = (cq.Workplane("XY")
+            v_rib = (Workplane("XY")
                     .box(body_width, rib_thickness, body_height)
                     .translate((0, body_width/2 + body_depth/2, 0)))
             result = result.union(v_rib)
@@ -600,14 +679,14 @@ class ConnectorGenerator:
         junction_size = max(body_width, body_height) * 2  # Make junction large enough for both slots
         
         # Create main body
-        result = (cq.Workplane("XY")
+        result = (Workplane("XY")
                  .box(junction_size, junction_size, body_height))
         
         # Create slots
-        h_slot = (cq.Workplane("XY")
+        h_slot = (Workplane("XY")
                  .box(junction_size * 1.2, slot_width, slot_height))  # Slightly longer to ensure it cuts through
         
-        v_slot = (cq.Workplane("XY")
+        v_slot = (Workplane("XY")
                  .box(slot_width, junction_size * 1.2, slot_height))  # Slightly longer to ensure it cuts through
         
         # Cut slots
@@ -618,7 +697,7 @@ class ConnectorGenerator:
             
             # Add tapers at all four entrances
             for x_pos in [-junction_size/2 - taper_depth/2, junction_size/2 + taper_depth/2]:
-                h_taper = (cq.Workplane("XY")
+                h_taper = (Workplane("XY")
                           .box(taper_depth, slot_width + 2, slot_height)
                           .faces(">X" if x_pos < 0 else "<X")
                           .workplane()
@@ -627,7 +706,7 @@ class ConnectorGenerator:
                 result = result.cut(h_taper.translate((x_pos, 0, 0)))
             
             for y_pos in [-junction_size/2 - taper_depth/2, junction_size/2 + taper_depth/2]:
-                v_taper = (cq.Workplane("XY")
+                v_taper = (Workplane("XY")
                           .box(slot_width + 2, taper_depth, slot_height)
                           .faces(">Y" if y_pos < 0 else "<Y")
                           .workplane()
@@ -639,20 +718,131 @@ class ConnectorGenerator:
             # Add diagonal reinforcement ribs
             rib_thickness = min(1.5, self.wall_thickness/2)
             for angle in [45, 135]:
-                rib = (cq.Workplane("XY")
+                rib = (Workplane("XY")
                       .box(rib_thickness, junction_size * 0.8, body_height)
                       .rotate((0,0,0), (0,0,1), angle))
                 result = result.union(rib)
         
         return result
 
-    def save_segment(self, segment, filename, file_format='STEP'):
+    def _single_slot_feature_boxes(self, **_):
+        length = self.board_depth + (self.wall_thickness * 2)
+        connector_width = self.board_width + (self.wall_thickness * 2)
+        connector_height = self.board_thickness + (self.wall_thickness * 2)
+        taper_depth = min(2, self.wall_thickness)
+        return [
+            ("add_taper", (-length/2 - taper_depth/2, 0, 0),
+             (taper_depth, self.board_width + self.tolerance + 2, self.board_thickness + self.tolerance)),
+            ("add_ribs", (0, 0, 0), (min(1.5, self.wall_thickness/2), connector_width, connector_height)),
+            ("add_screw_holes", (0, 0, 0), (5, 5, connector_height)),
+        ]
+
+    def _corner_feature_boxes(self, angle=90, **_):
+        corner_size = self.board_thickness + (self.wall_thickness * 2)
+        connector_width = self.board_width + (self.wall_thickness * 2)
+        # The rib is a box turned 45 degrees about Z
+        extent = (min(1.5, self.wall_thickness/2) + corner_size * 1.4) / math.sqrt(2)
+        return [("add_ribs", (0, 0, 0), (extent, extent, connector_width))]
+
+    def _t_junction_feature_boxes(self, **_):
+        slot_width = self.board_width + self.tolerance
+        slot_height = self.board_thickness + self.tolerance
+        body_width = self.board_width + (self.wall_thickness * 2)
+        body_height = self.board_thickness + (self.wall_thickness * 2)
+        body_depth = self.board_depth + (self.wall_thickness * 2)
+        taper_depth = min(2, self.wall_thickness)
+        rib_thickness = min(1.5, self.wall_thickness/2)
+        boxes = [("add_taper", (x_pos, 0, 0), (taper_depth, slot_width + 2, slot_height))
+                 for x_pos in [-body_depth - taper_depth/2, body_depth + taper_depth/2]]
+        boxes.append(("add_taper", (0, body_width/2 + body_depth + taper_depth/2, 0),
+                      (slot_width + 2, taper_depth, slot_height)))
+        boxes += [("add_ribs", (x_pos, 0, 0), (rib_thickness, body_width, body_height))
+                  for x_pos in [-body_depth/2, 0, body_depth/2]]
+        boxes.append(("add_ribs", (0, body_width/2 + body_depth/2, 0),
+                      (body_width, rib_thickness, body_height)))
+        return boxes
+
+    def _cross_junction_feature_boxes(self, **_):
+        slot_width = self.board_width + self.tolerance
+        slot_height = self.board_thickness + self.tolerance
+        body_width = self.board_width + (self.wall_thickness * 2)
+        body_height = self.board_thickness + (self.wall_thickness * 2)
+        junction_size = max(body_width, body_height) * 2
+        taper_depth = min(2, self.wall_thickness)
+        offset = junction_size/2 + taper_depth/2
+        boxes = []
+        for pos in [-offset, offset]:
+            boxes.append(("add_taper", (pos, 0, 0), (taper_depth, slot_width + 2, slot_height)))
+            boxes.append(("add_taper", (0, pos, 0), (slot_width + 2, taper_depth, slot_height)))
+        # Both diagonal ribs share one bounding box
+        extent = (min(1.5, self.wall_thickness/2) + junction_size * 0.8) / math.sqrt(2)
+        boxes.append(("add_ribs", (0, 0, 0), (extent, extent, body_height)))
+        return boxes
+
+    def feature_boxes(self, connector_type, **parameters):
+        """Bounding boxes of the enabled features, without building them
+        
+        Returns a list of (feature, center, size) tuples; empty for builders
+        with no entry in PROXY_FEATURE_BOXES.
+        """
+        connector_type = connector_registry.get(connector_type)
+        method = PROXY_FEATURE_BOXES.get(connector_type.builder)
+        if method is None:
+            return []
+        return [(feature, center, size)
+                for feature, center, size in getattr(self, method)(**parameters)
+                if getattr(self, feature) and connector_type.supports(feature)]
+
+    def create_proxy(self, connector_type, **parameters):
+        """Creates a low-detail stand-in for a connector
+        
+        The proxy is the outer shell with its slots, built without any
+        features, plus one box per enabled feature showing the space it
+        occupies. The shell is cached, so changing only features is
+        nearly free. Proxies are for display; export the full connector.
+        
+        Returns:
+            A Workplane holding the shell and feature boxes as one compound
+        """
+        connector_type = connector_registry.get(connector_type)
+        arguments = connector_type.defaults()
+        arguments.update((name, value) for name, value in parameters.items()
+                         if name in arguments)
+        shell = _proxy_shell(connector_type.name, self.board_width, self.board_thickness,
+                             self.board_depth, self.wall_thickness, self.tolerance,
+                             tuple(sorted(arguments.items())))
+        boxes = [cq.Solid.makeBox(*size, pnt=cq.Vector(*(c - d/2 for c, d in zip(center, size))))
+                 for _, center, size in self.feature_boxes(connector_type.name, **arguments)]
+        return Workplane("XY").newObject([cq.Compound.makeCompound([shell] + boxes)])
+
+    def create_connector(self, connector_type, lod=LOD_FULL, **parameters):
+        """Creates a connector of a registered type
+        
+        Args:
+            connector_type: A connector_registry type name
+            lod: LOD_FULL for the finished part or LOD_PROXY for a quick
+                stand-in (see create_proxy)
+            **parameters: The type's extra parameters (e.g. angle); values
+                the type does not take are ignored
+        """
+        if lod == LOD_PROXY:
+            return self.create_proxy(connector_type, **parameters)
+        if lod != LOD_FULL:
+            raise ValueError(f"Unknown level of detail: {lod}")
+        return connector_registry.get(connector_type).build(self, **parameters)
+
+    def save_segment(self, segment, filename, file_format='STEP', deterministic=False,
+                     precision=None):
         """Saves a connector segment to a file
         
         Args:
             segment: The CadQuery workplane object to save
             filename: The name of the file (without extension)
             file_format: The format to save as ('STEP', 'STL', or 'DXF')
+            deterministic: For STEP, write byte-identical output for identical
+                geometry (fixed header, canonical entity order)
+            precision: Significant digits for real numbers in deterministic
+                STEP output (None keeps the exporter's values)
         """
         file_format = file_format.upper()
         if file_format not in ['STEP', 'STL', 'DXF']:
@@ -660,11 +850,43 @@ class ConnectorGenerator:
             
         full_filename = f"{filename}.{file_format.lower()}"
         
-        if file_format == 'STEP':
-            cq.exporters.export(segment, full_filename)
-        elif file_format == 'STL':
-            cq.exporters.export(segment, full_filename, tolerance=0.01)
-        elif file_format == 'DXF':
-            cq.exporters.export(segment, full_filename)
+        if file_format == 'STEP' and deterministic:
+            step_writer.export_step(segment, full_filename, precision)
+            return full_filename
+        
+        # Write a new file and move it into place rather than writing through
+        # the target: it may be a hard link into an export cache
+        temporary = f"{full_filename}.tmp"
+        try:
+            if file_format == 'STL':
+                cq.exporters.export(segment, temporary, exportType='STL', tolerance=0.01)
+            else:
+                cq.exporters.export(segment, temporary, exportType=file_format)
+            os.replace(temporary, full_filename)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
             
         return full_filename
+
+
+# Builders with proxy feature boxes, mapped to the ConnectorGenerator method
+# that lays them out; keep each in step with its builder. Layout methods
+# take any keyword arguments, since plugin types reusing a builder may
+# declare parameters of their own.
+PROXY_FEATURE_BOXES = {
+    "create_single_slot_segment": "_single_slot_feature_boxes",
+    "create_corner_segment": "_corner_feature_boxes",
+    "create_t_junction_segment": "_t_junction_feature_boxes",
+    "create_cross_junction_segment": "_cross_junction_feature_boxes",
+}
+
+
+@lru_cache(maxsize=PROXY_CACHE_SIZE)
+def _proxy_shell(connector_type, board_width, board_thickness, board_depth,
+                 wall_thickness, tolerance, parameters):
+    """Featureless build of a connector, shared by every proxy with these dimensions"""
+    generator = ConnectorGenerator(board_width, board_thickness, board_depth,
+                                   wall_thickness, tolerance)
+    return generator.create_connector(connector_type, **dict(parameters)).val()
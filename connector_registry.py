@@ -0,0 +1,236 @@
+"""Registry of connector types
+
+Every connector type the GUI, CLIs and batch service offer is a
+ConnectorType: its name, display label, the optional features it
+implements, any extra parameters it takes and a reference to its builder.
+Builders are referenced by name and only imported the first time a
+connector of that type is built, so listing types never loads the CAD
+kernel.
+
+Other packages add types through the "connector_generator.connector_types"
+entry point group, each entry point naming a ConnectorType object:
+
+    [project.entry-points."connector_generator.connector_types"]
+    dovetail = "my_connectors.types:DOVETAIL"
+
+Entry points are read from package metadata on first lookup, and a plugin's
+module is only imported when its type is first requested (or when all
+types are listed). Keep the module that defines the ConnectorType light
+and point `builder` at the module with the geometry code.
+"""
+import importlib
+import inspect
+import warnings
+from importlib.metadata import entry_points
+
+ENTRY_POINT_GROUP = "connector_generator.connector_types"
+
+FEATURES = ("add_taper", "add_ribs", "add_screw_holes")
+
+
+class Parameter:
+    """An extra numeric input a connector type takes besides the board/wall settings
+
+    Bounds are exclusive; None leaves that side open. A builder that only
+    supports some values lists them as `choices` instead.
+    """
+
+    def __init__(self, name, label, default, minimum=None, maximum=None, unit="",
+                 choices=None):
+        self.name = name
+        self.label = label
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.unit = unit
+        self.choices = tuple(float(choice) for choice in choices) if choices else None
+
+    def check(self, value):
+        """Returns value as a float, raising ValueError if it is out of range"""
+        value = float(value)
+        unit = f" {self.unit}" if self.unit else ""
+        if self.choices is not None and value not in self.choices:
+            allowed = " or ".join(f"{choice:g}" for choice in self.choices)
+            raise ValueError(f"{self.label} must be {allowed}{unit}")
+        if self.minimum is not None and value <= self.minimum:
+            raise ValueError(f"{self.label} must be more than {self.minimum:g}{unit}")
+        if self.maximum is not None and value >= self.maximum:
+            raise ValueError(f"{self.label} must be less than {self.maximum:g}{unit}")
+        return value
+
+    def __repr__(self):
+        return f"Parameter({self.name!r}, default={self.default!r})"
+
+
+class ConnectorType:
+    """One kind of connector and how to build it
+
+    Args:
+        name: Identifier used in specs, file names and on the command line
+        label: Name shown in the GUI
+        builder: Either a ConnectorGenerator method name, or "module:function"
+            for a function called as function(generator, **parameters)
+        features: The FEATURES the builder implements; others are ignored
+        parameters: Parameter objects for extra builder arguments
+    """
+
+    def __init__(self, name, label, builder, features=FEATURES, parameters=()):
+        unknown = set(features) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown features for {name}: {', '.join(sorted(unknown))}")
+        self.name = name
+        self.label = label
+        self.builder = builder
+        self.features = frozenset(features)
+        self.parameters = tuple(parameters)
+        self._function = None
+
+    def supports(self, feature):
+        return feature in self.features
+
+    @property
+    def is_method(self):
+        """True if the builder is a ConnectorGenerator method"""
+        return ":" not in self.builder
+
+    def defaults(self):
+        """Returns {parameter name: default value}"""
+        return {parameter.name: parameter.default for parameter in self.parameters}
+
+    def _builder_function(self):
+        if self._function is None:
+            module_name, _, attribute = self.builder.partition(":")
+            function = importlib.import_module(module_name)
+            for part in attribute.split("."):
+                function = getattr(function, part)
+            self._function = function
+        return self._function
+
+    def build(self, generator, **parameters):
+        """Builds this connector type with a ConnectorGenerator's settings
+
+        Parameters the type does not declare are dropped, so callers can
+        pass every value a spec holds; missing ones take their defaults. A
+        ConnectorGenerator method only receives the parameters it names, so
+        types can reuse a built-in builder and declare parameters of their own.
+        """
+        arguments = self.defaults()
+        arguments.update((name, value) for name, value in parameters.items()
+                         if name in arguments)
+        if self.is_method:
+            method = getattr(generator, self.builder)
+            accepted = inspect.signature(method).parameters
+            return method(**{name: value for name, value in arguments.items()
+                             if name in accepted})
+        return self._builder_function()(generator, **arguments)
+
+    def __repr__(self):
+        return f"ConnectorType({self.name!r}, builder={self.builder!r})"
+
+
+class Registry:
+    """Name -> ConnectorType table, filled from code and entry points"""
+
+    def __init__(self, group=ENTRY_POINT_GROUP):
+        self.group = group
+        self._types = {}
+        self._pending = None  # Unloaded entry points by name, read on first lookup
+
+    def register(self, connector_type, replace=False):
+        """Adds a type; registering an existing name needs replace=True
+
+        Types registered at runtime exist only in this process; sandbox and
+        batch workers see built-in and entry point types only.
+        """
+        if connector_type.name in self._types and not replace:
+            raise ValueError(f"Connector type already registered: {connector_type.name}")
+        self._types[connector_type.name] = connector_type
+        return connector_type
+
+    def _entry_points(self):
+        if self._pending is None:
+            self._pending = {entry_point.name: entry_point
+                             for entry_point in entry_points(group=self.group)
+                             if entry_point.name not in self._types}
+        return self._pending
+
+    def _load(self, name):
+        entry_point = self._entry_points().pop(name)
+        connector_type = entry_point.load()
+        if not isinstance(connector_type, ConnectorType):
+            raise TypeError(f"Entry point {entry_point.value} is not a ConnectorType")
+        if connector_type.name != name:
+            raise ValueError(f"Entry point {name} declares connector type {connector_type.name}")
+        return self.register(connector_type)
+
+    def get(self, name):
+        """Returns the ConnectorType called `name`
+
+        Raises:
+            ValueError: If no such type is registered or installed
+        """
+        if name in self._types:
+            return self._types[name]
+        if name in self._entry_points():
+            return self._load(name)
+        raise ValueError(f"Unknown connector type: {name}")
+
+    def __contains__(self, name):
+        return name in self._types or name in self._entry_points()
+
+    def names(self):
+        """Names of every type, built-in first, without importing plugins"""
+        return list(self._types) + sorted(self._entry_points())
+
+    def types(self):
+        """Every ConnectorType, loading all plugin declarations
+
+        A plugin that fails to load is skipped with a warning so one broken
+        package does not hide the rest.
+        """
+        for name in sorted(self._entry_points()):
+            try:
+                self._load(name)
+            except Exception as e:
+                warnings.warn(f"Could not load connector type {name}: {str(e)}")
+        return list(self._types.values())
+
+
+# Built-in types, shown in this order in the GUI
+BUILTIN_TYPES = (
+    ConnectorType("end_to_end", "End to End", "create_single_slot_segment"),
+    ConnectorType("angle", "Angle", "create_corner_segment", features=("add_ribs",),
+                  parameters=(Parameter("angle", "Angle", 90.0, unit="degrees",
+                                        choices=(90,)),)),
+    ConnectorType("t_conn", "T-Connection", "create_t_junction_segment",
+                  features=("add_taper", "add_ribs")),
+    ConnectorType("cross", "Cross", "create_cross_junction_segment",
+                  features=("add_taper", "add_ribs")),
+)
+
+registry = Registry()
+for _connector_type in BUILTIN_TYPES:
+    registry.register(_connector_type)
+
+register = registry.register
+get = registry.get
+names = registry.names
+types = registry.types
+
+
+def main(argv=None):
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="List the available connector types")
+    parser.parse_args(argv)
+    for connector_type in types():
+        features = ", ".join(sorted(connector_type.features)) or "none"
+        sys.stdout.write(f"{connector_type.name}: {connector_type.label} "
+                         f"({connector_type.builder}; features: {features})\n")
+        for parameter in connector_type.parameters:
+            sys.stdout.write(f"    {parameter.name} = {parameter.default:g} {parameter.unit}\n")
+
+
+if __name__ == "__main__":
+    main()
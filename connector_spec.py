@@ -0,0 +1,196 @@
+import hashlib
+import json
+import struct
+from dataclasses import asdict, dataclass, fields, replace
+
+import connector_registry
+
+# Decimal places floats are rounded to, so 0.2 and 0.20000001 are the same spec
+PRECISION = 6
+
+FILE_FORMATS = ("STEP", "STL", "DXF")
+
+# Binary layout: five dimensions, feature bit flags, the connector type as a
+# length-prefixed UTF-8 string, a parameter count and each parameter as a
+# length-prefixed name and a double, then the file format
+_NUMBERS = struct.Struct("<5dB")
+_DOUBLE = struct.Struct("<d")
+
+_FLAG_BITS = (("add_taper", 1), ("add_ribs", 2), ("add_screw_holes", 4))
+
+
+@dataclass(frozen=True, slots=True)
+class ConnectorSpec:
+    """Canonical, immutable description of one connector job
+
+    Floats are rounded to PRECISION decimals on creation (and -0.0 becomes
+    0.0), so specs that only differ by float noise compare and hash equal.
+    Use `digest` rather than `hash()` as a key that must be stable across
+    processes and machines.
+
+    `parameters` holds the connector type's extra inputs (see
+    connector_registry), given as a dict and stored as sorted (name, value)
+    pairs. For a registered type, missing parameters take their defaults,
+    values are range-checked, undeclared ones are dropped and features the
+    type does not implement are turned off, so every spec that builds the
+    same part is the same spec.
+    """
+
+    board_width: float
+    board_thickness: float
+    board_depth: float
+    wall_thickness: float = 3.0
+    tolerance: float = 0.2
+    add_taper: bool = False
+    add_ribs: bool = False
+    add_screw_holes: bool = False
+    connector_type: str = "end_to_end"
+    parameters: tuple = ()
+    file_format: str = "STEP"
+
+    def __post_init__(self):
+        # Unrolled on purpose: this runs for every spec in a sweep
+        set_field = object.__setattr__
+        set_field(self, "board_width", round(float(self.board_width), PRECISION) + 0.0)
+        set_field(self, "board_thickness", round(float(self.board_thickness), PRECISION) + 0.0)
+        set_field(self, "board_depth", round(float(self.board_depth), PRECISION) + 0.0)
+        set_field(self, "wall_thickness", round(float(self.wall_thickness), PRECISION) + 0.0)
+        set_field(self, "tolerance", round(float(self.tolerance), PRECISION) + 0.0)
+        set_field(self, "add_taper", bool(self.add_taper))
+        set_field(self, "add_ribs", bool(self.add_ribs))
+        set_field(self, "add_screw_holes", bool(self.add_screw_holes))
+        set_field(self, "connector_type", str(self.connector_type).lower())
+        parameters = dict(self.parameters)
+        if self.connector_type in connector_registry.registry:
+            # Parameters the type does not declare are dropped, as in
+            # ConnectorType.build, so changing the type keeps a spec valid
+            connector_type = connector_registry.get(self.connector_type)
+            parameters = {parameter.name: parameter.check(parameters.get(parameter.name,
+                                                                         parameter.default))
+                          for parameter in connector_type.parameters}
+            for feature in connector_registry.FEATURES:
+                if not connector_type.supports(feature):
+                    set_field(self, feature, False)
+        set_field(self, "parameters", tuple(sorted(
+            (str(name), round(float(value), PRECISION) + 0.0)
+            for name, value in parameters.items())))
+        file_format = str(self.file_format).upper()
+        if file_format not in FILE_FORMATS:
+            raise ValueError(f"Unsupported file format: {self.file_format}")
+        set_field(self, "file_format", file_format)
+
+    def generator_kwargs(self):
+        """Returns the ConnectorGenerator keyword arguments for this spec"""
+        return {
+            "board_width": self.board_width,
+            "board_thickness": self.board_thickness,
+            "board_depth": self.board_depth,
+            "wall_thickness": self.wall_thickness,
+            "tolerance": self.tolerance,
+            "add_taper": self.add_taper,
+            "add_ribs": self.add_ribs,
+            "add_screw_holes": self.add_screw_holes,
+        }
+
+    def type_parameters(self):
+        """Returns the connector-type parameters as a dict"""
+        return dict(self.parameters)
+
+    def generator(self):
+        """Returns a ConnectorGenerator configured from this spec"""
+        from connector_models import ConnectorGenerator
+        return ConnectorGenerator(**self.generator_kwargs())
+
+    def build(self, lod=None):
+        """Builds the connector geometry described by this spec
+
+        Args:
+            lod: connector_models.LOD_FULL (the default) for the finished
+                part or LOD_PROXY for a quick stand-in (see
+                ConnectorGenerator.create_proxy)
+        """
+        from connector_models import LOD_FULL
+
+        return self.generator().create_connector(self.connector_type, lod=lod or LOD_FULL,
+                                                 **self.type_parameters())
+
+    def replace(self, **changes):
+        """Returns a copy with some fields changed"""
+        return replace(self, **changes)
+
+    def _geometry_bytes(self):
+        flags = 0
+        for name, bit in _FLAG_BITS:
+            if getattr(self, name):
+                flags |= bit
+        connector_type = self.connector_type.encode("utf-8")
+        parts = [_NUMBERS.pack(self.board_width, self.board_thickness, self.board_depth,
+                               self.wall_thickness, self.tolerance, flags),
+                 bytes((len(connector_type),)), connector_type, bytes((len(self.parameters),))]
+        for name, value in self.parameters:
+            name = name.encode("utf-8")
+            parts += [bytes((len(name),)), name, _DOUBLE.pack(value)]
+        return b"".join(parts)
+
+    def to_bytes(self):
+        """Packs the spec into a compact binary record"""
+        file_format = self.file_format.encode("utf-8")
+        return self._geometry_bytes() + bytes((len(file_format),)) + file_format
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Unpacks a record written by to_bytes"""
+        width, thickness, depth, wall, tolerance, flags = _NUMBERS.unpack_from(data)
+        offset = _NUMBERS.size
+
+        def read_string():
+            nonlocal offset
+            length = data[offset]
+            text = bytes(data[offset + 1:offset + 1 + length]).decode("utf-8")
+            offset += 1 + length
+            return text
+
+        connector_type = read_string()
+        parameters = {}
+        count = data[offset]
+        offset += 1
+        for _ in range(count):
+            name = read_string()
+            parameters[name], = _DOUBLE.unpack_from(data, offset)
+            offset += _DOUBLE.size
+        file_format = read_string()
+        return cls(width, thickness, depth, wall, tolerance,
+                   *(bool(flags & bit) for _, bit in _FLAG_BITS),
+                   connector_type=connector_type, parameters=parameters,
+                   file_format=file_format)
+
+    def to_dict(self):
+        data = asdict(self)
+        data["parameters"] = self.type_parameters()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates a spec from a dict, rejecting unknown keys"""
+        unknown = set(data) - {f.name for f in fields(cls)}
+        if unknown:
+            raise ValueError(f"Unknown spec fields: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    @property
+    def digest(self):
+        """Stable 16-hex-digit content hash, usable as a job or queue key"""
+        return hashlib.sha256(self.to_bytes()).hexdigest()[:16]
+
+    @property
+    def geometry_digest(self):
+        """Like digest, but of the shape fields only, so every file format
+        of the same part shares it"""
+        return hashlib.sha256(self._geometry_bytes()).hexdigest()[:16]
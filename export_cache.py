@@ -0,0 +1,176 @@
+"""Content-addressed export cache that shares identical output files
+
+Every exported file is stored once under objects/ in the cache directory,
+named by the SHA-256 of its bytes, and requested output paths are hard
+links to that object. An entry file per part and format remembers which
+object its geometry produced, so repeating a spec skips both the build and
+the export, and exporting a part in a second format reuses the shape
+built for the first within the same process. Entries live under a
+directory named for the generator, STEP writer and CAD kernel versions,
+so outputs made by other code are never reused. Because outputs are hard
+links, editing one output file in place changes every file linked to it.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from file_utils import file_checksum
+
+OBJECTS_DIR = "objects"
+ENTRIES_DIR = "entries"
+
+# Bump when the cache layout or entry format changes
+CACHE_VERSION = 1
+
+# Recently built shapes kept per process, by geometry digest
+SHAPE_CACHE_SIZE = 8
+
+_shapes = OrderedDict()
+
+
+def build_shape(spec):
+    """Builds a spec's geometry, reusing a shape built recently in this process"""
+    key = spec.geometry_digest
+    if key in _shapes:
+        _shapes.move_to_end(key)
+        return _shapes[key]
+    segment = spec.build()
+    _shapes[key] = segment
+    if len(_shapes) > SHAPE_CACHE_SIZE:
+        _shapes.popitem(last=False)
+    return segment
+
+
+def _entry_name(spec):
+    return f"{spec.geometry_digest}.{spec.file_format.lower()}"
+
+
+def _package_version(name):
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def generator_version():
+    """Returns a string naming everything that shapes an export's bytes"""
+    import connector_models
+    import step_writer
+
+    return (f"cache {CACHE_VERSION}; geometry {connector_models.GEOMETRY_VERSION}; "
+            f"step_writer {step_writer.FORMAT_VERSION}; "
+            f"cadquery {_package_version('cadquery')}; ocp {_package_version('cadquery-ocp')}")
+
+
+class ExportCache:
+    """Deduplicating exporter backed by a cache directory
+
+    Args:
+        path: Cache directory, created if missing. Put it on the same file
+            system as the outputs so hard links work; otherwise files are
+            copied.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.objects = self.path / OBJECTS_DIR
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.version = generator_version()
+        self.entries = (self.path / ENTRIES_DIR
+                        / hashlib.sha256(self.version.encode()).hexdigest()[:16])
+        if not self.entries.exists():
+            self.entries.mkdir(parents=True, exist_ok=True)
+            (self.entries / "VERSION").write_text(self.version + "\n")
+        self.stats = {"spec_hits": 0, "content_hits": 0, "writes": 0, "links": 0, "copies": 0}
+
+    def _record(self, spec, source):
+        # One small file per entry, replaced atomically, so workers sharing
+        # the cache never overwrite each other's entries
+        descriptor, temporary = tempfile.mkstemp(dir=self.entries, suffix=".tmp")
+        with os.fdopen(descriptor, "w") as f:
+            f.write(source.name)
+        os.replace(temporary, self.entries / _entry_name(spec))
+
+    def _object_path(self, checksum, extension):
+        return self.objects / f"{checksum}.{extension}"
+
+    def lookup(self, spec):
+        """Returns the cached object for a spec, or None"""
+        try:
+            name = (self.entries / _entry_name(spec)).read_text()
+        except FileNotFoundError:
+            return None
+        path = self.objects / name
+        return path if path.exists() else None
+
+    def _write(self, spec, segment):
+        extension = spec.file_format.lower()
+        descriptor, temporary = tempfile.mkstemp(dir=self.objects, suffix=f".{extension}")
+        os.close(descriptor)
+        try:
+            spec.generator().save_segment(segment, temporary[:-len(extension) - 1],
+                                          spec.file_format, deterministic=True)
+            checksum = file_checksum(temporary)
+            target = self._object_path(checksum, extension)
+            if target.exists():
+                self.stats["content_hits"] += 1
+                os.remove(temporary)
+            else:
+                self.stats["writes"] += 1
+                # mkstemp creates owner-only files; outputs should be readable
+                os.chmod(temporary, 0o644)
+                os.replace(temporary, target)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return target
+
+    def _link(self, source, target):
+        target = Path(target)
+        if target.exists():
+            if target.samefile(source):
+                return target
+            target.unlink()
+        try:
+            os.link(source, target)
+            self.stats["links"] += 1
+        except OSError:
+            shutil.copyfile(source, target)
+            self.stats["copies"] += 1
+        return target
+
+    def export(self, spec, target, segment=None):
+        """Exports a spec to `target`, reusing an identical earlier output
+
+        Args:
+            spec: The ConnectorSpec being exported
+            target: Output file path, including extension
+            segment: Already-built geometry; built from the spec only if
+                the cache has no output for it
+
+        Returns:
+            The target path
+        """
+        source = self.lookup(spec)
+        if source is not None:
+            self.stats["spec_hits"] += 1
+        else:
+            if segment is None:
+                segment = build_shape(spec)
+            source = self._write(spec, segment)
+            self._record(spec, source)
+        Path(target).parent.mkdir(parents=True, exist_ok=True)
+        return self._link(source, target)
+
+
+def export_cached(spec, cache_dir, target):
+    """Exports a spec through the cache in `cache_dir`, returning the target path
+
+    Module-level so it can be sent to a sandbox worker.
+    """
+    return str(ExportCache(cache_dir).export(spec, target))
@@ -0,0 +1,10 @@
+import hashlib
+
+
+def file_checksum(path):
+    """Returns the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
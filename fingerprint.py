@@ -0,0 +1,63 @@
+import math
+
+# Relative tolerance for volume/area comparisons and absolute tolerance (mm)
+# for positions, loose enough to survive OCC version differences
+REL_TOL = 1e-4
+ABS_TOL = 1e-3
+
+# Relative slack on face and edge counts. OCC versions split and merge
+# faces differently for the same solid, so counts only catch gross changes
+# (a feature appearing or vanishing); volume and bbox carry the precision.
+TOPOLOGY_TOL = 0.25
+
+
+def geometric_fingerprint(segment):
+    """Returns a compact, JSON-friendly summary of a connector's geometry
+
+    Args:
+        segment: A CadQuery Workplane or Shape
+
+    Returns:
+        Dict with volume, surface area, bounding box, topology counts and
+        center of mass, all rounded so they are stable to store
+    """
+    shape = segment.val() if hasattr(segment, "val") else segment
+    bbox = shape.BoundingBox()
+    center = shape.Center()
+    return {
+        "volume": round(shape.Volume(), 6),
+        "area": round(shape.Area(), 6),
+        "bbox": [round(v, 6) for v in (bbox.xmin, bbox.ymin, bbox.zmin,
+                                       bbox.xmax, bbox.ymax, bbox.zmax)],
+        "faces": len(shape.Faces()),
+        "edges": len(shape.Edges()),
+        "solids": len(shape.Solids()),
+        "center": [round(v, 6) for v in (center.x, center.y, center.z)],
+    }
+
+
+def compare_fingerprints(actual, expected, rel_tol=REL_TOL, abs_tol=ABS_TOL,
+                         topology_tol=TOPOLOGY_TOL):
+    """Compares two fingerprints and returns a list of human-readable differences
+
+    Solid counts must match exactly; face and edge counts may differ by
+    `topology_tol` of the expected count (at least one).
+    """
+    differences = []
+    if actual["solids"] != expected["solids"]:
+        differences.append(f"solids: {actual['solids']} != {expected['solids']}")
+
+    for key in ("faces", "edges"):
+        slack = max(1, round(expected[key] * topology_tol))
+        if abs(actual[key] - expected[key]) > slack:
+            differences.append(f"{key}: {actual[key]} != {expected[key]} (+/- {slack})")
+
+    for key in ("volume", "area"):
+        if not math.isclose(actual[key], expected[key], rel_tol=rel_tol, abs_tol=abs_tol):
+            differences.append(f"{key}: {actual[key]} != {expected[key]}")
+
+    for key in ("bbox", "center"):
+        if not all(math.isclose(a, e, abs_tol=abs_tol) for a, e in zip(actual[key], expected[key])):
+            differences.append(f"{key}: {actual[key]} != {expected[key]}")
+
+    return differences
@@ -1,15 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from connector_models import ConnectorGenerator
-import cadquery as cq
+import connector_registry
+from connector_spec import ConnectorSpec
+from export_cache import export_cached
+from sandbox import Sandbox
 import os
 from pathlib import Path
 
+# Export cache directory, inside the output directory so hard links work
+CACHE_DIR = ".connector_cache"
+
 class ConnectorGeneratorGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Connector Generator")
         self.output_path = Path("output")  # Default output path
+        self.sandbox = None  # Worker process for isolated builds, started on first use
         self.setup_ui()
         
     def setup_ui(self):
@@ -60,61 +66,79 @@ class ConnectorGeneratorGUI:
         features_frame.grid(row=1, column=1, sticky=(tk.W, tk.E), pady=5, padx=5)
 
         # Taper option
+        self.feature_buttons = {}  # Disabled for connector types without the feature
         self.taper_var = tk.BooleanVar(value=False)
-        ttk.Checkbutton(features_frame, text="Add entrance taper", 
-                       variable=self.taper_var).grid(row=0, column=0, sticky=tk.W)
+        self.feature_buttons["add_taper"] = ttk.Checkbutton(features_frame, text="Add entrance taper", 
+                       variable=self.taper_var)
+        self.feature_buttons["add_taper"].grid(row=0, column=0, sticky=tk.W)
 
         # Reinforcement ribs option
         self.ribs_var = tk.BooleanVar(value=False)
-        ttk.Checkbutton(features_frame, text="Add reinforcement ribs", 
-                       variable=self.ribs_var).grid(row=1, column=0, sticky=tk.W)
+        self.feature_buttons["add_ribs"] = ttk.Checkbutton(features_frame, text="Add reinforcement ribs", 
+                       variable=self.ribs_var)
+        self.feature_buttons["add_ribs"].grid(row=1, column=0, sticky=tk.W)
 
         # Screw holes option
         self.screw_holes_var = tk.BooleanVar(value=False)
-        ttk.Checkbutton(features_frame, text="Add screw holes (5mm)", 
-                       variable=self.screw_holes_var).grid(row=2, column=0, sticky=tk.W)
+        self.feature_buttons["add_screw_holes"] = ttk.Checkbutton(features_frame, text="Add screw holes (5mm)", 
+                       variable=self.screw_holes_var)
+        self.feature_buttons["add_screw_holes"].grid(row=2, column=0, sticky=tk.W)
+
+        # Isolated build option
+        self.isolate_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(features_frame, text="Build in separate process (safer, slower)", 
+                       variable=self.isolate_var).grid(row=3, column=0, sticky=tk.W)
         
         # Connector Type Frame
         type_frame = ttk.LabelFrame(main_frame, text="Connector Type", padding="5")
         type_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=5)
         
-        # Connector type radio buttons
-        self.connector_type = tk.StringVar(value="end_to_end")
-        
-        ttk.Radiobutton(type_frame, text="End to End", 
-                       variable=self.connector_type, 
-                       value="end_to_end").grid(row=0, column=0, sticky=tk.W)
-        
-        ttk.Radiobutton(type_frame, text="Angle", 
-                       variable=self.connector_type, 
-                       value="angle").grid(row=1, column=0, sticky=tk.W)
+        # Connector type radio buttons, one per registered type
+        connector_types = connector_registry.types()
+        self.connector_type = tk.StringVar(value=connector_types[0].name)
+        self.parameter_vars = {}  # (type name, parameter name) -> StringVar
+        parameter_frames = {}
         
-        ttk.Radiobutton(type_frame, text="T-Connection", 
-                       variable=self.connector_type, 
-                       value="t_conn").grid(row=2, column=0, sticky=tk.W)
-        
-        ttk.Radiobutton(type_frame, text="Cross", 
-                       variable=self.connector_type, 
-                       value="cross").grid(row=3, column=0, sticky=tk.W)
-        
-        # Angle input (only for angle connector)
-        angle_frame = ttk.Frame(type_frame)
-        angle_frame.grid(row=1, column=1, sticky=tk.W, padx=10)
-        
-        ttk.Label(angle_frame, text="Angle:").grid(row=0, column=0, sticky=tk.W)
-        self.angle_var = tk.StringVar(value="90")
-        ttk.Entry(angle_frame, textvariable=self.angle_var, width=5).grid(row=0, column=1, padx=5)
-        ttk.Label(angle_frame, text="degrees").grid(row=0, column=2, sticky=tk.W)
+        for row, connector_type in enumerate(connector_types):
+            ttk.Radiobutton(type_frame, text=connector_type.label, 
+                           variable=self.connector_type, 
+                           value=connector_type.name).grid(row=row, column=0, sticky=tk.W)
+            
+            # Extra inputs (e.g. the angle), only shown for the selected type
+            if connector_type.parameters:
+                parameter_frame = ttk.Frame(type_frame)
+                parameter_frame.grid(row=row, column=1, sticky=tk.W, padx=10)
+                for column, parameter in enumerate(connector_type.parameters):
+                    var = tk.StringVar(value=f"{parameter.default:g}")
+                    self.parameter_vars[(connector_type.name, parameter.name)] = var
+                    ttk.Label(parameter_frame, text=f"{parameter.label}:").grid(
+                        row=0, column=column * 3, sticky=tk.W)
+                    if parameter.choices:
+                        # Only offer the values the builder supports
+                        entry = ttk.Combobox(parameter_frame, textvariable=var, width=5,
+                                             values=[f"{c:g}" for c in parameter.choices],
+                                             state="readonly")
+                    else:
+                        entry = ttk.Entry(parameter_frame, textvariable=var, width=5)
+                    entry.grid(row=0, column=column * 3 + 1, padx=5)
+                    ttk.Label(parameter_frame, text=parameter.unit).grid(
+                        row=0, column=column * 3 + 2, sticky=tk.W)
+                parameter_frames[connector_type.name] = parameter_frame
         
-        # Update angle frame visibility based on connector type
-        def update_angle_visibility(*args):
-            if self.connector_type.get() == "angle":
-                angle_frame.grid()
-            else:
-                angle_frame.grid_remove()
+        # Show the selected type's inputs and grey out features it ignores
+        def update_type_options(*args):
+            name = self.connector_type.get()
+            for type_name, parameter_frame in parameter_frames.items():
+                if type_name == name:
+                    parameter_frame.grid()
+                else:
+                    parameter_frame.grid_remove()
+            connector_type = connector_registry.get(name)
+            for feature, button in self.feature_buttons.items():
+                button.state(["!disabled"] if connector_type.supports(feature) else ["disabled"])
         
-        self.connector_type.trace_add("write", update_angle_visibility)
-        update_angle_visibility()  # Initial state
+        self.connector_type.trace_add("write", update_type_options)
+        update_type_options()  # Initial state
         
         # Output Location Frame
         output_frame = ttk.LabelFrame(main_frame, text="Output Location", padding="5")
@@ -130,7 +154,11 @@ class ConnectorGeneratorGUI:
 
         # Generate Button (move to after output location)
         ttk.Button(main_frame, text="Generate Connector", 
-                  command=self.generate_connector).grid(row=3, column=0, columnspan=2, pady=10)
+                  command=self.generate_connector).grid(row=3, column=0, pady=10)
+        
+        # Calibration plate button
+        ttk.Button(main_frame, text="Generate Calibration Plate", 
+                  command=self.generate_calibration_plate).grid(row=3, column=1, pady=10)
         
         # Status Label
         self.status_var = tk.StringVar()
@@ -150,10 +178,7 @@ class ConnectorGeneratorGUI:
             wall_thickness = float(self.wall_thickness_var.get())
             tolerance = float(self.tolerance_var.get())
             
-            if self.connector_type.get() == "angle":
-                angle = float(self.angle_var.get())
-                if not 0 < angle < 360:
-                    raise ValueError("Angle must be between 0 and 360 degrees")
+            self.type_parameters()  # Raises ValueError for out-of-range values
             
             if any(dim <= 0 for dim in [width, thickness, depth, wall_thickness]):
                 raise ValueError("Dimensions must be positive numbers")
@@ -166,6 +191,32 @@ class ConnectorGeneratorGUI:
             messagebox.showerror("Invalid Input", str(e))
             return False
             
+    def type_parameters(self):
+        """Returns the selected connector type's extra parameter values"""
+        connector_type = connector_registry.get(self.connector_type.get())
+        return {parameter.name: parameter.check(
+                    self.parameter_vars[(connector_type.name, parameter.name)].get())
+                for parameter in connector_type.parameters}
+            
+    def current_spec(self):
+        """Returns the ConnectorSpec for the current form values
+
+        Features the selected type does not support are left out, whatever
+        their (disabled) checkboxes still hold.
+        """
+        return ConnectorSpec(
+            float(self.width_var.get()),
+            float(self.thickness_var.get()),
+            float(self.depth_var.get()),
+            float(self.wall_thickness_var.get()),
+            float(self.tolerance_var.get()),
+            self.taper_var.get(),
+            self.ribs_var.get(),
+            self.screw_holes_var.get(),
+            connector_type=self.connector_type.get(),
+            parameters=self.type_parameters()
+        )
+            
     def browse_output_location(self):
         """Open file dialog to choose output location"""
         directory = filedialog.askdirectory(
@@ -182,28 +233,7 @@ class ConnectorGeneratorGUI:
             return
             
         try:
-            # Create generator instance with all parameters
-            generator = ConnectorGenerator(
-                float(self.width_var.get()),
-                float(self.thickness_var.get()),
-                float(self.depth_var.get()),
-                float(self.wall_thickness_var.get()),
-                float(self.tolerance_var.get()),
-                self.taper_var.get(),
-                self.ribs_var.get(),
-                self.screw_holes_var.get()
-            )
-            
-            # Generate the appropriate connector
-            connector_type = self.connector_type.get()
-            if connector_type == "end_to_end":
-                result = generator.create_single_slot_segment()
-            elif connector_type == "angle":
-                result = generator.create_corner_segment()
-            elif connector_type == "t_conn":
-                result = generator.create_t_junction_segment()
-            elif connector_type == "cross":
-                result = generator.create_cross_junction_segment()
+            spec = self.current_spec()
                 
             # Get output filename and add connector type
             filename = self.filename_var.get().strip()
@@ -221,10 +251,21 @@ class ConnectorGeneratorGUI:
             
             # Create output directory if it doesn't exist
             self.output_path.mkdir(exist_ok=True)
-            
-            # Export to STEP file
             output_file = self.output_path / filename
-            cq.exporters.export(result, str(output_file))
+            
+            if self.isolate_var.get():
+                # Build and export in a worker process so a kernel crash
+                # only loses this connector, not the whole application
+                if self.sandbox is None:
+                    self.sandbox = Sandbox()
+                outcome = self.sandbox.run(export_cached, spec,
+                                           str(self.output_path / CACHE_DIR), str(output_file))
+                if not outcome.ok:
+                    raise RuntimeError(outcome.error)
+            else:
+                # Export to STEP file, reusing an identical earlier export
+                # (as a hard link) instead of rebuilding it
+                export_cached(spec, self.output_path / CACHE_DIR, output_file)
             
             self.status_var.set(f"Saved to: {output_file}")
             messagebox.showinfo("Success", 
@@ -237,6 +278,30 @@ class ConnectorGeneratorGUI:
             self.status_var.set(f"Error: {str(e)}")
             messagebox.showerror("Error", f"Failed to generate connector: {str(e)}")
 
+    def generate_calibration_plate(self):
+        """Generate a tolerance calibration plate for the current board thickness"""
+        if not self.validate_inputs():
+            return
+            
+        try:
+            # Imported here so starting the GUI does not load the CAD kernel
+            from calibration import build_calibration_plate, save_calibration_plate
+            
+            plate = build_calibration_plate(float(self.thickness_var.get()),
+                                            walls=[float(self.wall_thickness_var.get())])
+            
+            self.output_path.mkdir(exist_ok=True)
+            filename = self.filename_var.get().strip() or "connector"
+            output_file = save_calibration_plate(plate, str(self.output_path / f"{filename}_calibration"))
+            
+            self.status_var.set(f"Saved to: {output_file}")
+            messagebox.showinfo("Success", 
+                              f"Calibration plate generated!\nSaved as: {output_file}")
+            
+        except Exception as e:
+            self.status_var.set(f"Error: {str(e)}")
+            messagebox.showerror("Error", f"Failed to generate calibration plate: {str(e)}")
+
 def main():
     root = tk.Tk()
     app = ConnectorGeneratorGUI(root)
@@ -0,0 +1,462 @@
+"""Distributed batch generation through a shared SQLite job queue
+
+A coordinator submits ConnectorSpecs to a queue file on shared storage.
+Any number of stateless workers, on any machine that mounts that storage,
+pull jobs from the queue, build them and write the exports to a shared
+output directory:
+
+    python job_queue.py submit /shared/queue.db specs.jsonl
+    python job_queue.py worker /shared/queue.db --output /shared/output --processes 4
+    python job_queue.py status /shared/queue.db
+
+A claimed job carries a lease that the worker renews while it builds. If
+a worker dies or stalls, the lease runs out and the next idle worker takes
+the job over. Jobs are keyed by spec digest and exports go to
+content-addressed names via a temporary file, so a job that runs twice
+produces the same file and a second submit of the same spec is a no-op.
+
+The queue relies on SQLite file locking: keep it on a local disk or a
+network file system with working POSIX locks (e.g. NFSv4), and keep the
+worker clocks in sync, since leases are wall-clock times.
+"""
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import batch
+import metrics
+import sandbox as sandbox_module
+from batch import DONE, FAILED, QUARANTINED, STARTED
+from connector_spec import ConnectorSpec
+
+PENDING = "pending"
+
+# Seconds a claim lasts without renewal; workers renew every third of it
+LEASE_SECONDS = 120
+
+# Seconds an idle worker waits before polling the queue again
+POLL_INTERVAL = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    digest TEXT PRIMARY KEY,
+    spec TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker TEXT,
+    token TEXT,
+    lease_until REAL,
+    output TEXT,
+    checksum TEXT,
+    error TEXT,
+    details TEXT,
+    submitted REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, submitted);
+"""
+
+
+class Job:
+    """A job claimed by a worker"""
+
+    def __init__(self, digest, spec, attempt, token):
+        self.digest = digest
+        self.spec = spec
+        self.attempt = attempt
+        self.token = token
+
+    def __repr__(self):
+        return f"Job({self.digest!r}, attempt={self.attempt})"
+
+
+class JobQueue:
+    """Job queue stored in an SQLite file
+
+    Args:
+        path: Queue database, created if missing
+        lease_seconds: How long a claim lasts without renewal
+    """
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        # Autocommit mode; writes that read first take the lock up front
+        # with BEGIN IMMEDIATE so two workers never claim the same job
+        self._db = sqlite3.connect(str(self.path), timeout=60, isolation_level=None,
+                                   check_same_thread=False)
+        self._lock = threading.Lock()  # Shared with the lease renewal thread
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _transaction(self, function, *args):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = function(*args)
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return result
+
+    def submit(self, specs, max_attempts=batch.MAX_ATTEMPTS):
+        """Adds specs to the queue, skipping any already queued
+
+        Returns:
+            The number of new jobs
+        """
+        now = time.time()
+        rows = [(spec.digest, spec.to_json(), PENDING, max_attempts, now, now) for spec in specs]
+
+        def insert():
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO jobs (digest, spec, status, max_attempts, submitted, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?)", rows)
+            return self._db.total_changes - before
+
+        return self._transaction(insert)
+
+    def claim(self, worker):
+        """Takes the oldest pending job, or one whose lease has run out
+
+        A job whose lease expired counts as a failed attempt, and is
+        quarantined instead of handed out once it has used all of them.
+
+        Returns:
+            A Job, or None if nothing is ready
+        """
+        def take():
+            now = time.time()
+            while True:
+                row = self._db.execute(
+                    "SELECT digest, spec, attempts, max_attempts, status FROM jobs"
+                    " WHERE status = ? OR (status = ? AND lease_until < ?)"
+                    " ORDER BY status = ?, submitted LIMIT 1",
+                    (PENDING, STARTED, now, STARTED)).fetchone()
+                if row is None:
+                    return None
+                digest, spec, attempts, max_attempts, status = row
+                if attempts >= max_attempts:
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, error = ?, token = NULL, updated = ?"
+                        " WHERE digest = ?",
+                        (QUARANTINED, f"Lease expired on attempt {attempts}", now, digest))
+                    continue
+                token = uuid.uuid4().hex
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, worker = ?, token = ?,"
+                    " lease_until = ?, updated = ? WHERE digest = ?",
+                    (STARTED, worker, token, now + self.lease_seconds, now, digest))
+                return Job(digest, ConnectorSpec.from_json(spec), attempts + 1, token)
+
+        return self._transaction(take)
+
+    def renew(self, job):
+        """Extends a job's lease; returns False if another worker took it over"""
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET lease_until = ?, updated = ? WHERE digest = ? AND token = ?",
+                (now + self.lease_seconds, now, job.digest, job.token))
+        return cursor.rowcount == 1
+
+    def complete(self, job, output, checksum, details=None):
+        """Marks a job done; ignored if its lease was taken over meanwhile"""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, output = ?, checksum = ?, error = NULL, details = ?,"
+                " token = NULL, lease_until = NULL, updated = ? WHERE digest = ? AND token = ?",
+                (DONE, output, checksum, json.dumps(details or {}), time.time(),
+                 job.digest, job.token))
+        return cursor.rowcount == 1
+
+    def fail(self, job, error, details=None):
+        """Returns a failed job to the queue, or quarantines it on its last attempt"""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END,"
+                " error = ?, details = ?, token = NULL, lease_until = NULL, updated = ?"
+                " WHERE digest = ? AND token = ?",
+                (QUARANTINED, PENDING, error, json.dumps(details or {}), time.time(),
+                 job.digest, job.token))
+        return cursor.rowcount == 1
+
+    def requeue(self, statuses=(QUARANTINED,)):
+        """Puts jobs in the given statuses back in the queue with fresh attempts"""
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._lock:
+            cursor = self._db.execute(
+                f"UPDATE jobs SET status = ?, attempts = 0, token = NULL, lease_until = NULL,"
+                f" updated = ? WHERE status IN ({placeholders})",
+                (PENDING, time.time(), *statuses))
+        return cursor.rowcount
+
+    def counts(self):
+        """Returns {status: job count}"""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {PENDING: 0, STARTED: 0, DONE: 0, QUARANTINED: 0}
+        counts.update(rows)
+        return counts
+
+    def is_drained(self):
+        """True when no job is pending or running"""
+        counts = self.counts()
+        return counts[PENDING] == 0 and counts[STARTED] == 0
+
+    def jobs(self, status=None):
+        """Returns job rows as dicts, optionally only those in one status"""
+        query = "SELECT * FROM jobs" + (" WHERE status = ?" if status else "") + " ORDER BY submitted"
+        with self._lock:
+            cursor = self._db.execute(query, (status,) if status else ())
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+class _LeaseKeeper(threading.Thread):
+    """Renews a job's lease in the background while it builds"""
+
+    def __init__(self, queue, job):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.job = job
+        self.lost = False
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.queue.lease_seconds / 3):
+            if not self.queue.renew(self.job):
+                self.lost = True
+                return
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_worker(queue_path, output_dir, worker_id=None, isolate=False, cache_dir=None,
+               lease_seconds=LEASE_SECONDS, poll_interval=POLL_INTERVAL, exit_when_drained=True,
+               max_jobs=None, timeout=batch.ISOLATED_TIMEOUT, memory_limit_mb=None, log=None,
+               json_log=None):
+    """Pulls and builds jobs until the queue is drained (or forever)
+
+    Retries of a job that failed before always run in a sandbox worker, as
+    in run_batch.
+
+    Args:
+        queue_path: Queue database on shared storage
+        output_dir: Shared output directory as mounted on this machine
+        worker_id: Name recorded against claimed jobs (defaults to host:pid)
+        isolate: Build every job in a sandbox subprocess
+        cache_dir: Optional ExportCache directory for deduplicated exports
+        lease_seconds: Lease length for this worker's claims
+        poll_interval: Seconds to wait when nothing is ready
+        exit_when_drained: Stop once nothing is pending or running; when
+            False the worker keeps polling for new jobs
+        max_jobs: Stop after this many jobs
+        timeout: Seconds a sandboxed job may run
+        memory_limit_mb: Memory limit for the sandbox worker
+        log: Optional callable receiving one message per job
+        json_log: Optional metrics.JsonLog receiving one "job" event per job
+
+    Every job is also recorded in metrics.METRICS.
+
+    Returns:
+        Dict counting this worker's jobs per outcome
+    """
+    worker_id = worker_id or default_worker_id()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    summary = {DONE: 0, FAILED: 0, "lost": 0}
+
+    with JobQueue(queue_path, lease_seconds) as queue, \
+            sandbox_module.Sandbox(timeout, memory_limit_mb, batch.WORKER_MAX_JOBS) as sandbox:
+        while max_jobs is None or sum(summary.values()) < max_jobs:
+            job = queue.claim(worker_id)
+            if job is None:
+                if exit_when_drained and queue.is_drained():
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            keeper = _LeaseKeeper(queue, job)
+            keeper.start()
+            try:
+                if isolate or job.attempt > 1:
+                    status, details = batch.run_isolated(job.spec, output_dir, sandbox, cache_dir)
+                else:
+                    try:
+                        status, details = DONE, batch.build_and_export(job.spec, output_dir,
+                                                                       cache_dir)
+                    except Exception as e:
+                        status, details = FAILED, {"error": f"{type(e).__name__}: {str(e)}"}
+            finally:
+                keeper.stop()
+
+            metrics.record_job(job.spec.connector_type, status, details)
+            if json_log:
+                json_log.write("job", spec_hash=job.digest, connector_type=job.spec.connector_type,
+                               status=status, attempt=job.attempt, worker=worker_id, **details)
+
+            if status == DONE:
+                # Record the name only; other machines may mount the output elsewhere
+                recorded = queue.complete(job, Path(details.pop("output")).name,
+                                          details.pop("checksum"), details)
+            else:
+                recorded = queue.fail(job, details.pop("error"), details)
+            outcome = (DONE if status == DONE else FAILED) if recorded else "lost"
+            summary[outcome] += 1
+            if log:
+                log(f"{worker_id} {job.digest} attempt {job.attempt} {status}"
+                    + ("" if recorded else " (lease lost, result discarded)"))
+
+    return summary
+
+
+def _worker_process(kwargs):
+    json_log_path = kwargs.pop("json_log_path", None)
+    json_log = metrics.JsonLog(json_log_path) if json_log_path else None
+    try:
+        return run_worker(json_log=json_log, **kwargs)
+    finally:
+        if json_log:
+            json_log.close()
+
+
+def run_workers(processes, queue_path, output_dir, **kwargs):
+    """Runs several workers on this machine and sums their summaries
+
+    Pass json_log_path to have every worker append its job events to one
+    JSON Lines file.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = [dict(kwargs, queue_path=str(queue_path), output_dir=str(output_dir),
+                 worker_id=f"{socket.gethostname()}:{index}:{uuid.uuid4().hex[:6]}")
+            for index in range(processes)]
+    # Executor workers (unlike Pool's) may start sandbox subprocesses
+    with ProcessPoolExecutor(processes, multiprocessing.get_context("spawn")) as executor:
+        summaries = list(executor.map(_worker_process, jobs))
+    total = {}
+    for summary in summaries:
+        for key, count in summary.items():
+            total[key] = total.get(key, 0) + count
+    return total
+
+
+def wait(queue_path, poll_interval=POLL_INTERVAL, log=None):
+    """Blocks until the queue is drained and returns the final counts"""
+    with JobQueue(queue_path) as queue:
+        while not queue.is_drained():
+            if log:
+                log(", ".join(f"{count} {status}" for status, count in queue.counts().items()))
+            time.sleep(poll_interval)
+        return queue.counts()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Distributed connector generation")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Queue connector specs")
+    submit.add_argument("queue", help="Queue database")
+    submit.add_argument("specs", help="Connector specs, one JSON object per line")
+    submit.add_argument("--max-attempts", type=int, default=batch.MAX_ATTEMPTS)
+    submit.add_argument("--wait", action="store_true", help="Wait until the queue is drained")
+
+    worker = commands.add_parser("worker", help="Build queued jobs")
+    worker.add_argument("queue", help="Queue database")
+    worker.add_argument("--output", default="output", help="Shared output directory")
+    worker.add_argument("--processes", type=int, default=1, help="Worker processes to run")
+    worker.add_argument("--isolate", action="store_true",
+                        help="Run every job in a sandboxed subprocess")
+    worker.add_argument("--cache", metavar="DIR",
+                        help="Share identical outputs through an export cache in DIR")
+    worker.add_argument("--lease", type=float, default=LEASE_SECONDS,
+                        help="Lease length in seconds")
+    worker.add_argument("--forever", action="store_true",
+                        help="Keep polling for new jobs instead of exiting when drained")
+    worker.add_argument("--timeout", type=float, default=batch.ISOLATED_TIMEOUT,
+                        help="Seconds a sandboxed job may run")
+    worker.add_argument("--memory-limit", type=int, metavar="MB",
+                        help="Memory limit for the sandbox worker")
+    worker.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics on this local port "
+                             "(not with --processes)")
+    worker.add_argument("--log-json", metavar="FILE",
+                        help="Append one JSON line per job to FILE")
+
+    status = commands.add_parser("status", help="Show job counts")
+    status.add_argument("queue", help="Queue database")
+    status.add_argument("--errors", action="store_true", help="List quarantined jobs")
+
+    requeue = commands.add_parser("requeue", help="Retry quarantined jobs")
+    requeue.add_argument("queue", help="Queue database")
+
+    args = parser.parse_args(argv)
+    if args.command == "worker" and args.metrics_port is not None and args.processes > 1:
+        # Each worker process keeps its own metrics, and only one can serve a port
+        parser.error("--metrics-port needs a single worker process")
+    log = lambda message: sys.stdout.write(message + "\n")
+
+    if args.command == "submit":
+        with JobQueue(args.queue) as queue:
+            added = queue.submit(batch.load_specs(args.specs), args.max_attempts)
+        log(f"Queued {added} new jobs")
+        if args.wait:
+            counts = wait(args.queue, log=log)
+            log(", ".join(f"{count} {status}" for status, count in counts.items()))
+            return 0 if not counts[QUARANTINED] else 1
+    elif args.command == "worker":
+        options = dict(isolate=args.isolate, cache_dir=args.cache, lease_seconds=args.lease,
+                       exit_when_drained=not args.forever, timeout=args.timeout,
+                       memory_limit_mb=args.memory_limit)
+        if args.processes > 1:
+            summary = run_workers(args.processes, args.queue, args.output,
+                                  json_log_path=args.log_json, **options)
+        else:
+            if args.metrics_port is not None:
+                metrics.serve(args.metrics_port)
+            json_log = metrics.JsonLog(args.log_json) if args.log_json else None
+            summary = run_worker(args.queue, args.output, log=log, json_log=json_log, **options)
+            if json_log:
+                json_log.close()
+        log(", ".join(f"{count} {status}" for status, count in summary.items()))
+    elif args.command == "status":
+        with JobQueue(args.queue) as queue:
+            log(", ".join(f"{count} {status}" for status, count in queue.counts().items()))
+            if args.errors:
+                for job in queue.jobs(QUARANTINED):
+                    log(f"{job['digest']}: {job['error']}")
+    elif args.command == "requeue":
+        with JobQueue(args.queue) as queue:
+            log(f"Requeued {queue.requeue()} jobs")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,4 +1,7 @@
+import multiprocessing
 from gui import main
 
 if __name__ == "__main__":
+    # Needed for sandbox worker processes in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,270 @@
+"""Memory-mapped store of tessellated connector meshes
+
+A store is a directory holding two flat arrays shared by all parts and a
+JSON index:
+
+    vertices.f32    float32 (x, y, z) rows of every part, back to back
+    triangles.u32   uint32 vertex-index rows, relative to each part's vertices
+    index.json      key -> offsets and counts into the two arrays
+
+Reading a part memory-maps the arrays and slices them, so previews and STL
+re-export never parse STEP/STL files. Keys are ConnectorSpec geometry
+digests, shared by every file format of a part.
+"""
+import json
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from shm_transport import MESH_TOLERANCE, TRIANGLE_DTYPE, VERTEX_DTYPE, tessellate
+
+VERTICES_FILE = "vertices.f32"
+TRIANGLES_FILE = "triangles.u32"
+INDEX_FILE = "index.json"
+
+# Parts added in a batch() block between index writes
+FLUSH_EVERY = 100
+
+# Batch exports are named <connector_type>_<geometry digest>.<ext>
+_DIGEST_NAME = re.compile(r"_([0-9a-f]{16})$")
+
+
+class MeshStore:
+    """Append-only mesh store in a directory
+
+    Args:
+        path: Store directory, created if missing
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._index = {}
+        self._maps = None
+        self._deferred = False
+        self._flush_every = None
+        self._unflushed = 0
+        self._dirty = False
+        index_file = self.path / INDEX_FILE
+        if index_file.exists():
+            with open(index_file) as f:
+                self._index = json.load(f)
+        # Rows covered by the index; appends go after these
+        self._vertex_count, self._triangle_count = self._counts()
+
+    def __contains__(self, key):
+        return self._key(key) in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def keys(self):
+        return list(self._index)
+
+    @staticmethod
+    def _key(key):
+        return key.geometry_digest if hasattr(key, "geometry_digest") else str(key)
+
+    def _counts(self):
+        vertex_count = triangle_count = 0
+        for entry in self._index.values():
+            vertex_count = max(vertex_count, entry["vertex_offset"] + entry["vertex_count"])
+            triangle_count = max(triangle_count,
+                                 entry["triangle_offset"] + entry["triangle_count"])
+        return vertex_count, triangle_count
+
+    def _write_index(self):
+        temporary = self.path / (INDEX_FILE + ".tmp")
+        with open(temporary, "w") as f:
+            json.dump(self._index, f, separators=(",", ":"))
+        os.replace(temporary, self.path / INDEX_FILE)
+        self._dirty = False
+        self._unflushed = 0
+
+    def flush(self):
+        """Writes the index if parts were added since it was last written"""
+        if self._dirty:
+            self._write_index()
+
+    @contextmanager
+    def batch(self, flush_every=FLUSH_EVERY):
+        """Defers index writes while adding many parts
+
+        The index is written every `flush_every` parts (None for only at
+        the end) and when the block ends. Parts added after the last write
+        of a process that dies are dropped the next time the store is
+        opened, as if they had not been added.
+        """
+        self._deferred = True
+        self._flush_every = flush_every
+        try:
+            yield self
+        finally:
+            self._deferred = False
+            self._flush_every = None
+            self.flush()
+
+    def add(self, key, vertices, triangles, **metadata):
+        """Appends a mesh under `key` (a ConnectorSpec or digest string)
+
+        Re-adding an existing key stores the new mesh and points the index at
+        it; the old rows stay in the files until the store is rebuilt.
+        """
+        vertices = np.ascontiguousarray(vertices, dtype=VERTEX_DTYPE).reshape(-1, 3)
+        triangles = np.ascontiguousarray(triangles, dtype=TRIANGLE_DTYPE).reshape(-1, 3)
+        vertex_offset, triangle_offset = self._vertex_count, self._triangle_count
+
+        # Truncate to the indexed size first, dropping rows from an append
+        # that was interrupted before its index entry was written
+        for name, array, offset in ((VERTICES_FILE, vertices, vertex_offset),
+                                    (TRIANGLES_FILE, triangles, triangle_offset)):
+            with open(self.path / name, "ab") as f:
+                f.truncate(offset * 3 * array.itemsize)
+                f.write(array.tobytes())
+
+        entry = {
+            "vertex_offset": vertex_offset,
+            "vertex_count": len(vertices),
+            "triangle_offset": triangle_offset,
+            "triangle_count": len(triangles),
+        }
+        entry.update(metadata)
+        self._index[self._key(key)] = entry
+        self._vertex_count += len(vertices)
+        self._triangle_count += len(triangles)
+        self._dirty = True
+        self._unflushed += 1
+        if not self._deferred or (self._flush_every
+                                  and self._unflushed >= self._flush_every):
+            self._write_index()
+        self._maps = None
+        return entry
+
+    def add_shape(self, key, shape, tolerance=MESH_TOLERANCE, **metadata):
+        """Tessellates a CadQuery shape and stores it under `key`"""
+        return self.add(key, *tessellate(shape, tolerance), **metadata)
+
+    def _open_maps(self):
+        if self._maps is None:
+            vertex_count, triangle_count = self._vertex_count, self._triangle_count
+            vertices = (np.memmap(self.path / VERTICES_FILE, VERTEX_DTYPE, "r",
+                                  shape=(vertex_count, 3))
+                        if vertex_count else np.empty((0, 3), VERTEX_DTYPE))
+            triangles = (np.memmap(self.path / TRIANGLES_FILE, TRIANGLE_DTYPE, "r",
+                                   shape=(triangle_count, 3))
+                         if triangle_count else np.empty((0, 3), TRIANGLE_DTYPE))
+            self._maps = (vertices, triangles)
+        return self._maps
+
+    def get(self, key):
+        """Returns read-only (vertices, triangles) views for a stored part
+
+        Raises:
+            KeyError: If the key is not in the store
+        """
+        entry = self._index[self._key(key)]
+        vertices, triangles = self._open_maps()
+        start = entry["vertex_offset"]
+        vertex_view = vertices[start:start + entry["vertex_count"]]
+        start = entry["triangle_offset"]
+        triangle_view = triangles[start:start + entry["triangle_count"]]
+        return vertex_view, triangle_view
+
+    def metadata(self, key):
+        return dict(self._index[self._key(key)])
+
+    def export_stl(self, key, filename):
+        """Writes a stored part as a binary STL without touching the CAD kernel"""
+        vertices, triangles = self.get(key)
+        corners = vertices[triangles]
+        normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+        records = np.zeros(len(triangles), dtype=[("normal", "<f4", 3),
+                                                  ("corners", "<f4", (3, 3)),
+                                                  ("attribute", "<u2")])
+        records["normal"] = normals
+        records["corners"] = corners
+        with open(filename, "wb") as f:
+            f.write(b"\0" * 80)
+            f.write(np.uint32(len(triangles)).tobytes())
+            f.write(records.tobytes())
+        return filename
+
+
+def _step_key(path):
+    match = _DIGEST_NAME.search(path.stem)
+    if match:
+        return match.group(1)
+    # Files without a spec digest in the name are keyed by their contents
+    from file_utils import file_checksum
+    return file_checksum(path)[:16]
+
+
+def rebuild_from_step(step_dir, store_path, tolerance=MESH_TOLERANCE, log=None):
+    """Builds a fresh store from every STEP file in a directory
+
+    Args:
+        step_dir: Directory containing .step files (e.g. output/)
+        store_path: Store directory; any existing store there is replaced
+        tolerance: Tessellation deflection in mm
+        log: Optional callable receiving one message per file
+
+    Returns:
+        The new MeshStore
+    """
+    import cadquery as cq
+
+    store_path = Path(store_path)
+    for name in (VERTICES_FILE, TRIANGLES_FILE, INDEX_FILE):
+        if (store_path / name).exists():
+            (store_path / name).unlink()
+    store = MeshStore(store_path)
+
+    with store.batch():
+        for path in sorted(Path(step_dir).glob("*.step")):
+            try:
+                shape = cq.importers.importStep(str(path))
+            except Exception as e:
+                if log:
+                    log(f"Skipped {path}: {str(e)}")
+                continue
+            key = _step_key(path)
+            entry = store.add_shape(key, shape, tolerance, source=str(path))
+            if log:
+                log(f"{path} -> {key} ({entry['triangle_count']} triangles)")
+    return store
+
+
+def main(argv=None):
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Build or query a mesh store")
+    parser.add_argument("store", help="Store directory")
+    parser.add_argument("--rebuild-from", metavar="DIR",
+                        help="Rebuild the store from the STEP files in DIR")
+    parser.add_argument("--tolerance", type=float, default=MESH_TOLERANCE)
+    parser.add_argument("--export-stl", nargs=2, metavar=("KEY", "FILE"),
+                        help="Write a stored part as STL")
+    args = parser.parse_args(argv)
+
+    def log(message):
+        sys.stdout.write(message + "\n")
+
+    if args.rebuild_from:
+        store = rebuild_from_step(args.rebuild_from, args.store, args.tolerance, log)
+    else:
+        store = MeshStore(args.store)
+
+    if args.export_stl:
+        store.export_stl(*args.export_stl)
+    sys.stdout.write(f"{len(store)} parts in {args.store}\n")
+
+
+if __name__ == "__main__":
+    main()
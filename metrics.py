@@ -0,0 +1,332 @@
+"""Runtime metrics and structured logs for connector generation
+
+Batch runs and queue workers record every job into METRICS: job counts by
+type and outcome, build/export latency histograms, boolean operation and
+triangle counts, export cache hits and process memory. The numbers are
+exposed in the Prometheus text format on a local HTTP endpoint:
+
+    python batch.py specs.jsonl --metrics-port 9464 --log-json jobs.jsonl
+    curl localhost:9464/metrics
+
+and each job is also written as one line of a JSON Lines log.
+"""
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Windows has no getrusage; RSS falls back to /proc only
+    resource = None
+
+# ru_maxrss is in bytes on macOS and in kilobytes on Linux and the BSDs
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+# Latency buckets (seconds) spanning a proxy build to a heavy STEP export
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+# Triangle count buckets for tessellated exports
+TRIANGLE_BUCKETS = (100, 1000, 10000, 100000, 1000000)
+
+# Boolean operation count buckets per build
+BOOLEAN_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield self.name, key, value
+
+
+class Gauge(Counter):
+    """Value that can go up and down, optionally read at scrape time
+
+    Args:
+        function: Optional callable returning the current value; used
+            instead of stored values when given
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help, function=None):
+        super().__init__(name, help)
+        self.function = function
+
+    def set(self, value, **labels):
+        self.values[tuple(sorted(labels.items()))] = value
+
+    def samples(self):
+        if self.function is not None:
+            yield self.name, (), self.function()
+        else:
+            yield from super().samples()
+
+
+class Histogram:
+    """Cumulative bucketed distribution per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.values = {}  # label key -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        row = self.values.setdefault(key, [0] * (len(self.buckets) + 2))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                row[index] += 1
+        row[-2] += value
+        row[-1] += 1
+
+    def count(self, **labels):
+        row = self.values.get(tuple(sorted(labels.items())))
+        return row[-1] if row else 0
+
+    def samples(self):
+        for key, row in sorted(self.values.items()):
+            for bound, count in zip(self.buckets, row):
+                yield f"{self.name}_bucket", key + (("le", _number(bound)),), count
+            yield f"{self.name}_sum", key, row[-2]
+            yield f"{self.name}_count", key, row[-1]
+
+
+def rss_bytes():
+    """Current resident set size of this process, or the peak where unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process (0 where unavailable)"""
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+
+class Metrics:
+    """A set of named metrics, safe to update from several threads"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help):
+        return self._add(Counter(name, help))
+
+    def gauge(self, name, help, function=None):
+        return self._add(Gauge(name, help, function))
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, buckets))
+
+    def __getitem__(self, name):
+        return self._metrics[name]
+
+    @contextmanager
+    def updating(self):
+        """Holds the lock so several updates appear together in a scrape"""
+        with self._lock:
+            yield self
+
+    def render(self):
+        """Returns all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for metric in self._metrics.values():
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                for name, labels, value in metric.samples():
+                    lines.append(f"{name}{_label_text(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def standard_metrics():
+    """Returns a Metrics holding the job metrics record_job fills in"""
+    metrics = Metrics()
+    metrics.counter("connector_jobs_total", "Jobs finished, by connector type and status")
+    metrics.histogram("connector_build_seconds", "Geometry build time per job")
+    metrics.histogram("connector_export_seconds", "Export time per job")
+    metrics.histogram("connector_boolean_ops", "Boolean operations per build", BOOLEAN_BUCKETS)
+    metrics.counter("connector_boolean_ops_total", "Boolean operations run by builds")
+    metrics.histogram("connector_triangles", "Triangles per tessellated export", TRIANGLE_BUCKETS)
+    metrics.counter("connector_cache_lookups_total", "Export cache lookups, by result")
+    metrics.gauge("connector_worker_peak_rss_bytes", "Peak RSS reported by the last job's process")
+    metrics.gauge("process_resident_memory_bytes", "Resident memory of this process", rss_bytes)
+    metrics.gauge("process_start_time_seconds", "Start time of this process").set(time.time())
+    return metrics
+
+
+# Process-wide metrics used by batch and job_queue
+METRICS = standard_metrics()
+
+
+def record_job(connector_type, status, details, registry=None):
+    """Adds one finished job to the metrics
+
+    Args:
+        connector_type: The job's connector type
+        status: Final status (e.g. batch.DONE or batch.FAILED)
+        details: The dict returned by batch.build_and_export, or an error dict
+        registry: Metrics to update (defaults to METRICS)
+    """
+    metrics = registry or METRICS
+    with metrics.updating():
+        metrics["connector_jobs_total"].inc(connector_type=connector_type, status=status)
+        if "build_time" in details:
+            metrics["connector_build_seconds"].observe(details["build_time"],
+                                                       connector_type=connector_type)
+        if "export_time" in details:
+            metrics["connector_export_seconds"].observe(details["export_time"],
+                                                        connector_type=connector_type)
+        if "boolean_ops" in details:
+            metrics["connector_boolean_ops"].observe(details["boolean_ops"],
+                                                     connector_type=connector_type)
+            metrics["connector_boolean_ops_total"].inc(details["boolean_ops"],
+                                                       connector_type=connector_type)
+        if "triangles" in details:
+            metrics["connector_triangles"].observe(details["triangles"],
+                                                   connector_type=connector_type)
+        if "cached" in details:
+            metrics["connector_cache_lookups_total"].inc(
+                result="hit" if details["cached"] else "miss")
+        if details.get("peak_rss"):
+            metrics["connector_worker_peak_rss_bytes"].set(details["peak_rss"])
+
+
+@contextmanager
+def count_boolean_ops():
+    """Counts the boolean operations connector builders run inside the block
+
+    Yields a dict whose "count" is filled in when the block exits. Only
+    geometry built on connector_models.Workplane is counted (the built-in
+    builders, not plugin builders using cq.Workplane), and the count is
+    process-wide, so builds running in other threads at the same time are
+    included.
+    """
+    from connector_models import boolean_op_count
+
+    result = {"count": 0}
+    start = boolean_op_count()
+    try:
+        yield result
+    finally:
+        result["count"] = boolean_op_count() - start
+
+
+def stl_triangle_count(path):
+    """Reads the triangle count from a binary STL header (None for ASCII STL)"""
+    with open(path, "rb") as f:
+        header = f.read(84)
+    if len(header) < 84:
+        return None
+    count, = struct.unpack_from("<I", header, 80)
+    return count if os.path.getsize(path) == 84 + 50 * count else None
+
+
+class JsonLog:
+    """Writes events as JSON Lines, one object per event
+
+    Args:
+        target: File path to append to, or an open text stream
+    """
+
+    def __init__(self, target):
+        if hasattr(target, "write"):
+            self._stream, self._owned = target, False
+        else:
+            self._stream, self._owned = open(target, "a"), True
+        self._lock = threading.Lock()
+
+    def write(self, event, **fields):
+        entry = {"time": time.time(), "event": event, "pid": os.getpid()}
+        entry.update(fields)
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            self._stream.write(line)
+            self._stream.flush()
+        return entry
+
+    def close(self):
+        if self._owned:
+            self._stream.close()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics = METRICS
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood stderr
+
+
+def serve(port, host="127.0.0.1", metrics=METRICS):
+    """Serves metrics at http://host:port/metrics from a background thread
+
+    Returns:
+        The server; call shutdown() to stop it. Pass port 0 to pick a free
+        port (see server.server_address).
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"metrics": metrics})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,369 @@
+"""Design-space search for the lightest connector that is strong enough
+
+For a connector type and board, every combination of wall thickness (on a
+fine grid), ribs and screw holes is scored with closed-form estimates of
+part volume and of the section modulus of the weakest cross-section. The
+whole grid is evaluated at once with numpy; the default grid of about two
+thousand candidates takes a few milliseconds. Candidates that break the
+minimum wall or miss the section modulus target are pruned, and only the
+lightest few survivors are built, validated and measured for real, in
+parallel worker processes.
+
+Section moduli are about the board's width axis: the sleeve bending the
+way the board is thinnest, which is how these joints fail.
+"""
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import connector_registry
+from connector_spec import ConnectorSpec
+from validation import HOLE_DIAMETER, MIN_WALL
+
+# Default wall thickness search range and step (mm)
+WALL_MIN = 0.5
+WALL_MAX = 10.0
+WALL_STEP = 0.01
+
+# Candidates built and measured per verification round, and rounds tried
+# before giving up
+VERIFY_TOP = 8
+VERIFY_ROUNDS = 3
+
+# Thickness (mm) of the slab used to measure a built cross-section
+SLAB = 0.01
+
+# Relative slack when comparing measured to required section modulus
+MEASURE_TOLERANCE = 1e-3
+
+
+def _dimensions(board_width, board_thickness, tolerance, wall):
+    return {
+        "B": board_width + wall * 2,          # Outer width
+        "H": board_thickness + wall * 2,      # Outer height
+        "b": board_width + tolerance,         # Slot width
+        "h": board_thickness + tolerance,     # Slot height
+        "r": np.minimum(1.5, wall / 2),       # Rib thickness
+    }
+
+
+# Estimates for each builder. Each returns (volume, section modulus) arrays
+# for an array of wall thicknesses, matching the builder's geometry; keep
+# them in step with connector_models.
+
+def _single_slot_estimate(board_width, board_thickness, board_depth, tolerance, wall,
+                          ribs, holes):
+    d = _dimensions(board_width, board_thickness, tolerance, wall)
+    B, H, b, h, r = d["B"], d["H"], d["b"], d["h"], d["r"]
+    length = board_depth + wall * 2
+    plate = (H - h) / 2  # Top/bottom wall thickness
+    volume = length * (B * H - b * h)
+    tube = (B * H ** 3 - b * h ** 3) / 12
+    inertia = tube
+    if ribs:
+        # The rib plate fills the slot at mid-length
+        volume = volume + r * b * h
+        inertia = np.minimum(tube, B * H ** 3 / 12)
+    if holes:
+        # One hole at mid-length through both walls (and the rib)
+        volume = volume - math.pi * HOLE_DIAMETER ** 2 / 4 * plate * 2
+        if ribs:
+            volume = volume - r * HOLE_DIAMETER * h
+            inertia = np.minimum(tube, (B - HOLE_DIAMETER) * H ** 3 / 12)
+        else:
+            inertia = tube - 2 * (HOLE_DIAMETER * plate ** 3 / 12
+                                  + HOLE_DIAMETER * plate * ((H - plate) / 2) ** 2)
+    return volume, inertia / (H / 2)
+
+
+def _t_junction_estimate(board_width, board_thickness, board_depth, tolerance, wall,
+                         ribs, holes):
+    d = _dimensions(board_width, board_thickness, tolerance, wall)
+    B, H, b, h, r = d["B"], d["H"], d["b"], d["h"], d["r"]
+    depth = board_depth + wall * 2
+    slot_depth = board_depth + tolerance
+    # The branch slot notches the main body's side wall where they meet
+    notch = np.minimum(slot_depth / 4, (B - b) / 2)
+    volume = (3 * depth * B * H - 2 * depth * b * h
+              - b * h * np.minimum(depth, 1.25 * slot_depth) - b * h * notch)
+    if ribs:
+        volume = volume + 4 * r * b * h + r * h * notch
+    # The branch braces the notched part, so the plain arm section is weakest
+    inertia = (B * H ** 3 - b * h ** 3) / 12
+    return volume, inertia / (H / 2)
+
+
+def _cross_junction_estimate(board_width, board_thickness, board_depth, tolerance, wall,
+                             ribs, holes):
+    d = _dimensions(board_width, board_thickness, tolerance, wall)
+    B, H, b, h, r = d["B"], d["H"], d["b"], d["h"], d["r"]
+    junction = np.maximum(B, H) * 2
+    volume = junction ** 2 * H - 2 * junction * b * h + b * b * h
+    if ribs:
+        volume = volume + 2 * math.sqrt(2) * r * h * b
+    # Where the slots cross only the top and bottom plates are left
+    inertia = junction * (H ** 3 - h ** 3) / 12
+    return volume, inertia / (H / 2)
+
+
+ESTIMATES = {
+    "create_single_slot_segment": _single_slot_estimate,
+    "create_t_junction_segment": _t_junction_estimate,
+    "create_cross_junction_segment": _cross_junction_estimate,
+}
+
+# Builders whose ribs sit inside the board slot. Ribbed candidates of these
+# always fail the board interference check, so they are never searched
+SLOT_RIBS = {
+    "create_single_slot_segment",
+    "create_t_junction_segment",
+    "create_cross_junction_segment",
+}
+
+
+def _stations(spec):
+    """Slot-axis positions of the weakest cross-sections, for measuring"""
+    builder = connector_registry.get(spec.connector_type).builder
+    body_width = spec.board_width + spec.wall_thickness * 2
+    depth = spec.board_depth + spec.wall_thickness * 2
+    if builder == "create_single_slot_segment":
+        return [0.0, depth / 4]
+    if builder == "create_t_junction_segment":
+        # On the main arm, between the branch and the end rib
+        return [body_width / 4 + depth / 2]
+    # Inside the crossing, clear of any rib at the centre
+    return [(spec.board_width + spec.tolerance) / 4]
+
+
+class Candidate:
+    """One point of the design space with its estimated and measured properties"""
+
+    def __init__(self, spec, volume, section_modulus):
+        self.spec = spec
+        self.volume = volume
+        self.section_modulus = section_modulus
+        self.measured_volume = None
+        self.measured_section_modulus = None
+        self.issues = []
+        self.verified = None
+
+    def to_dict(self):
+        return {
+            "spec": self.spec.to_dict(),
+            "volume": self.volume,
+            "section_modulus": self.section_modulus,
+            "measured_volume": self.measured_volume,
+            "measured_section_modulus": self.measured_section_modulus,
+            "verified": self.verified,
+            "issues": self.issues,
+        }
+
+    def __repr__(self):
+        return (f"Candidate(wall={self.spec.wall_thickness:g}, ribs={self.spec.add_ribs}, "
+                f"holes={self.spec.add_screw_holes}, volume={self.volume:.0f})")
+
+
+class SearchResult:
+    """Outcome of optimize(); `best` is None if nothing passed verification"""
+
+    def __init__(self):
+        self.best = None
+        self.evaluated = 0
+        self.feasible = 0
+        self.verified = []
+        self.estimate_time = 0.0
+        self.verify_time = 0.0
+
+    def to_dict(self):
+        return {
+            "best": self.best.to_dict() if self.best else None,
+            "evaluated": self.evaluated,
+            "feasible": self.feasible,
+            "verified": [candidate.to_dict() for candidate in self.verified],
+            "estimate_time": self.estimate_time,
+            "verify_time": self.verify_time,
+        }
+
+
+def wall_grid(start=WALL_MIN, stop=WALL_MAX, step=WALL_STEP):
+    """Wall thicknesses from start to stop (inclusive) in `step` increments"""
+    count = int(round((stop - start) / step)) + 1
+    return np.round(start + np.arange(count) * step, 6)
+
+
+def estimate(base, walls, ribs=False, holes=False):
+    """Estimates (volume, section modulus) arrays for a spec over many walls
+
+    Args:
+        base: ConnectorSpec giving the connector type, board and tolerance
+        walls: Array of wall thicknesses
+        ribs, holes: Feature flags for every candidate
+
+    Raises:
+        ValueError: If the connector type's builder has no estimate
+    """
+    builder = connector_registry.get(base.connector_type).builder
+    if builder not in ESTIMATES:
+        raise ValueError(f"No strength estimate for connector type {base.connector_type}")
+    walls = np.asarray(walls, dtype=float)
+    volume, modulus = ESTIMATES[builder](base.board_width, base.board_thickness,
+                                         base.board_depth, base.tolerance, walls, ribs, holes)
+    return np.broadcast_to(volume, walls.shape), np.broadcast_to(modulus, walls.shape)
+
+
+def measure_section_modulus(shape, x):
+    """Section modulus (mm^3) of a built shape's cross-section at X = x
+
+    Cuts a thin slab out of the shape and reads the section's second moment
+    from the slab's inertia, so holes, notches and ribs all count.
+    """
+    import cadquery as cq
+
+    slab = cq.Solid.makeBox(SLAB, 1e4, 1e4, pnt=cq.Vector(x - SLAB / 2, -5e3, -5e3))
+    piece = shape.intersect(slab)
+    if piece.Volume() <= 0:
+        return 0.0
+    inertia = cq.Shape.matrixOfInertia(piece)[1][1] / SLAB
+    center = cq.Shape.centerOfMass(piece)
+    box = piece.BoundingBox()
+    return inertia / max(box.zmax - center.z, center.z - box.zmin)
+
+
+def _verify(spec_json):
+    from validation import validate
+
+    spec = ConnectorSpec.from_json(spec_json)
+    generator = spec.generator()
+    shape = spec.build().val()
+    result = validate(generator, spec.connector_type, deep=True, shape=shape)
+    return {
+        "volume": shape.Volume(),
+        "section_modulus": min(measure_section_modulus(shape, x) for x in _stations(spec)),
+        "issues": [issue.to_dict() for issue in result.issues],
+        "ok": result.ok,
+    }
+
+
+def verify(candidates, min_section_modulus, max_workers=None):
+    """Builds candidates in parallel and checks them for real
+
+    A candidate is verified when validation finds no errors (walls, fit,
+    board interference, valid solid) and its measured section modulus
+    meets the target.
+    """
+    jobs = [candidate.spec.to_json() for candidate in candidates]
+    if max_workers == 1 or len(jobs) <= 1:
+        results = [_verify(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_verify, jobs))
+    for candidate, result in zip(candidates, results):
+        candidate.measured_volume = result["volume"]
+        candidate.measured_section_modulus = result["section_modulus"]
+        candidate.issues = result["issues"]
+        candidate.verified = (result["ok"] and result["section_modulus"]
+                              >= min_section_modulus * (1 - MEASURE_TOLERANCE))
+    return candidates
+
+
+def optimize(base, min_section_modulus, min_wall=MIN_WALL, walls=None, top=VERIFY_TOP,
+             rounds=VERIFY_ROUNDS, max_workers=None, log=None):
+    """Finds the lightest connector meeting a minimum wall and stiffness
+
+    Args:
+        base: ConnectorSpec fixing the connector type, board, tolerance and
+            taper; wall thickness, ribs (where they leave the slot clear)
+            and screw holes are searched
+        min_section_modulus: Required section modulus at the weakest
+            cross-section (mm^3)
+        min_wall: Thinnest wall left beside the slot (mm)
+        walls: Wall thicknesses to try (defaults to wall_grid())
+        top: Candidates verified per round
+        rounds: Verification rounds before giving up
+        max_workers: Worker processes for verification builds
+        log: Optional callable receiving progress messages
+
+    Returns:
+        A SearchResult
+    """
+    connector_type = connector_registry.get(base.connector_type)
+    walls = wall_grid() if walls is None else np.asarray(walls, dtype=float)
+    result = SearchResult()
+    search_ribs = (connector_type.supports("add_ribs")
+                   and connector_type.builder not in SLOT_RIBS)
+
+    start = time.perf_counter()
+    scored = []
+    for ribs in (False, True) if search_ribs else (False,):
+        for holes in (False, True) if connector_type.supports("add_screw_holes") else (False,):
+            volume, modulus = estimate(base, walls, ribs, holes)
+            result.evaluated += len(walls)
+            # Same side-wall rule as validation: the slot takes half the tolerance
+            feasible = ((walls - base.tolerance / 2 >= min_wall)
+                        & (modulus >= min_section_modulus))
+            scored += [(volume[i], modulus[i], walls[i], ribs, holes)
+                       for i in np.flatnonzero(feasible)]
+    scored.sort(key=lambda row: row[0])
+    result.feasible = len(scored)
+    result.estimate_time = time.perf_counter() - start
+    if log:
+        log(f"{result.evaluated} candidates estimated in {result.estimate_time * 1000:.1f} ms, "
+            f"{result.feasible} feasible")
+
+    start = time.perf_counter()
+    for round_index in range(rounds):
+        batch = [Candidate(base.replace(wall_thickness=float(wall), add_ribs=ribs,
+                                        add_screw_holes=holes), float(volume), float(modulus))
+                 for volume, modulus, wall, ribs, holes
+                 in scored[round_index * top:(round_index + 1) * top]]
+        if not batch:
+            break
+        verify(batch, min_section_modulus, max_workers)
+        result.verified += batch
+        passed = [candidate for candidate in batch if candidate.verified]
+        if log:
+            log(f"Round {round_index + 1}: {len(passed)} of {len(batch)} candidates verified")
+        if passed:
+            result.best = min(passed, key=lambda candidate: candidate.measured_volume)
+            break
+    result.verify_time = time.perf_counter() - start
+    return result
+
+
+def main(argv=None):
+    import argparse
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description="Find the lightest connector that is stiff enough")
+    parser.add_argument("--type", default="end_to_end", help="Connector type")
+    parser.add_argument("--width", type=float, default=100)
+    parser.add_argument("--thickness", type=float, default=10)
+    parser.add_argument("--depth", type=float, default=50)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--taper", action="store_true")
+    parser.add_argument("--section-modulus", type=float, required=True,
+                        help="Required section modulus at the weakest section (mm^3)")
+    parser.add_argument("--min-wall", type=float, default=MIN_WALL)
+    parser.add_argument("--wall-min", type=float, default=WALL_MIN)
+    parser.add_argument("--wall-max", type=float, default=WALL_MAX)
+    parser.add_argument("--wall-step", type=float, default=WALL_STEP)
+    parser.add_argument("--top", type=int, default=VERIFY_TOP,
+                        help="Candidates verified with real builds per round")
+    parser.add_argument("--workers", type=int, help="Verification worker processes")
+    args = parser.parse_args(argv)
+
+    base = ConnectorSpec(args.width, args.thickness, args.depth, tolerance=args.tolerance,
+                         add_taper=args.taper, connector_type=args.type)
+    result = optimize(base, args.section_modulus, args.min_wall,
+                      wall_grid(args.wall_min, args.wall_max, args.wall_step), args.top,
+                      max_workers=args.workers,
+                      log=lambda message: sys.stderr.write(message + "\n"))
+    sys.stdout.write(json.dumps(result.to_dict(), indent=1) + "\n")
+    return 0 if result.best else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 import traceback
 
@@ -9,4 +10,6 @@ except Exception as e:
     input("\nPress Enter to exit...")
 
 if __name__ == "__main__":
+    # Needed for sandbox worker processes in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     main()
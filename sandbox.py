@@ -0,0 +1,198 @@
+import multiprocessing
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:  # Windows has no rlimits; memory limits are skipped there
+    resource = None
+
+OK = "ok"
+ERROR = "error"
+TIMEOUT = "timeout"
+CRASHED = "crashed"
+
+# Defaults for a Sandbox: seconds per job, worker address space in MB (None
+# for no limit) and jobs a worker runs before it is replaced
+DEFAULT_TIMEOUT = 300
+DEFAULT_MEMORY_LIMIT_MB = None
+DEFAULT_MAX_JOBS = 50
+
+
+class SandboxResult:
+    """Outcome of one job run in a sandbox worker
+
+    `status` is OK, ERROR (the job raised), TIMEOUT or CRASHED (the worker
+    died, e.g. from a kernel segfault or hitting the memory limit).
+    """
+
+    def __init__(self, status, value=None, error=None, error_type=None,
+                 traceback=None, exitcode=None, elapsed=0.0):
+        self.status = status
+        self.value = value
+        self.error = error
+        self.error_type = error_type
+        self.traceback = traceback
+        self.exitcode = exitcode
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.status == OK
+
+    def to_dict(self):
+        return {
+            "status": self.status,
+            "error": self.error,
+            "error_type": self.error_type,
+            "exitcode": self.exitcode,
+            "elapsed": self.elapsed,
+        }
+
+    def __repr__(self):
+        return f"SandboxResult({self.status!r}, error={self.error!r})"
+
+
+def _limit_memory(memory_limit_mb):
+    if resource is None or not memory_limit_mb:
+        return
+    limit = int(memory_limit_mb * 1024 * 1024)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _worker_main(connection, memory_limit_mb):
+    _limit_memory(memory_limit_mb)
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        func, args, kwargs = message
+        try:
+            connection.send((OK, func(*args, **kwargs)))
+        except BaseException as e:
+            connection.send((ERROR, {
+                "error": str(e) or type(e).__name__,
+                "error_type": type(e).__name__,
+                "traceback": traceback.format_exc(),
+            }))
+    connection.close()
+
+
+class Sandbox:
+    """Runs functions in a supervised worker process
+
+    A single worker is kept alive between jobs so the CAD kernel is only
+    loaded once, and replaced after `max_jobs` jobs to bound memory growth
+    in OCC, after a timeout, or when it dies. Functions and their arguments
+    must be picklable (i.e. module-level functions).
+
+    Args:
+        timeout: Seconds a job may run before its worker is killed
+        memory_limit_mb: Address space limit for the worker (POSIX only)
+        max_jobs: Jobs a worker runs before it is recycled
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB,
+                 max_jobs=DEFAULT_MAX_JOBS):
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_jobs = max_jobs
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._connection = None
+        self._jobs = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _start(self):
+        parent, child = self._context.Pipe()
+        self._process = self._context.Process(target=_worker_main,
+                                              args=(child, self.memory_limit_mb),
+                                              daemon=True)
+        self._process.start()
+        child.close()
+        self._connection = parent
+        self._jobs = 0
+
+    def _stop(self, kill=False):
+        if self._process is None:
+            return
+        if not kill:
+            try:
+                self._connection.send(None)
+            except (BrokenPipeError, OSError):
+                kill = True
+            self._process.join(5)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        self._connection.close()
+        self._process = None
+        self._connection = None
+
+    def close(self):
+        """Shuts the worker down"""
+        self._stop()
+
+    def run(self, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) in the worker and returns a SandboxResult"""
+        if self._process is not None and (self._jobs >= self.max_jobs
+                                          or not self._process.is_alive()):
+            self._stop()
+        if self._process is None:
+            self._start()
+
+        start = time.perf_counter()
+        self._jobs += 1
+        try:
+            self._connection.send((func, args, kwargs))
+            if not self._connection.poll(self.timeout):
+                self._stop(kill=True)
+                return SandboxResult(TIMEOUT, error=f"Timed out after {self.timeout}s",
+                                     elapsed=time.perf_counter() - start)
+            status, payload = self._connection.recv()
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            self._process.join(5)
+            exitcode = self._process.exitcode
+            self._stop(kill=True)
+            return SandboxResult(CRASHED, error=f"Worker exited with code {exitcode}",
+                                 exitcode=exitcode, elapsed=time.perf_counter() - start)
+
+        elapsed = time.perf_counter() - start
+        if status == OK:
+            return SandboxResult(OK, value=payload, elapsed=elapsed)
+        return SandboxResult(ERROR, elapsed=elapsed, **payload)
+
+
+def run_trusted(func, *args, **kwargs):
+    """Runs a job in-process, reporting the outcome the same way as Sandbox.run
+
+    This is the fast path for parameters already known to build cleanly.
+    """
+    start = time.perf_counter()
+    try:
+        value = func(*args, **kwargs)
+    except Exception as e:
+        return SandboxResult(ERROR, error=str(e), error_type=type(e).__name__,
+                             traceback=traceback.format_exc(),
+                             elapsed=time.perf_counter() - start)
+    return SandboxResult(OK, value=value, elapsed=time.perf_counter() - start)
+
+
+def build_and_save(connector_type, params, filename, file_format="STEP", type_parameters=None):
+    """Builds a connector and saves it, returning the saved file name
+
+    Module-level so it can be sent to a sandbox worker.
+    """
+    from connector_models import ConnectorGenerator
+
+    generator = ConnectorGenerator(**params)
+    segment = generator.create_connector(connector_type, **(type_parameters or {}))
+    return generator.save_segment(segment, filename, file_format)
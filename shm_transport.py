@@ -0,0 +1,219 @@
+"""Moves geometry from worker processes to the parent through shared memory
+
+A worker puts a BREP blob or mesh in a block and returns a small ShmHandle;
+whoever receives it must take it (take_*/open_mesh) once, which unlinks it.
+"""
+import io
+import os
+import time
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+BREP = "brep"
+MESH = "mesh"
+
+# Default linear deflection (mm) used when tessellating shapes for transfer
+MESH_TOLERANCE = 0.01
+
+VERTEX_DTYPE = np.float32
+TRIANGLE_DTYPE = np.uint32
+
+# Blocks created by this process that are still waiting to be taken. The
+# worker keeps them mapped until its next transfer, because on Windows a
+# block disappears as soon as no process has it open.
+_outstanding = []
+
+
+class ShmHandle:
+    """Picklable reference to a shared memory block holding one result
+
+    For MESH handles, `vertex_count` and `triangle_count` describe the two
+    arrays stored back to back (vertices first) in the block.
+    """
+
+    def __init__(self, name, kind, size, vertex_count=0, triangle_count=0):
+        self.name = name
+        self.kind = kind
+        self.size = size
+        self.vertex_count = vertex_count
+        self.triangle_count = triangle_count
+
+    def __repr__(self):
+        return f"ShmHandle({self.name!r}, {self.kind!r}, {self.size})"
+
+
+def _release_outstanding():
+    while _outstanding:
+        _outstanding.pop().close()
+
+
+def _create(size):
+    _release_outstanding()
+    # The taker registers the block when it attaches and unregisters it on
+    # unlink; leaving it registered here would make this process's resource
+    # tracker unlink it at exit, possibly before the taker has read it
+    try:
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1), track=False)
+    except TypeError:  # Python < 3.13 has no track argument
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        if os.name == "posix":
+            # The tracker knows POSIX blocks by their "/"-prefixed name
+            resource_tracker.unregister("/" + block.name, "shared_memory")
+    _outstanding.append(block)
+    return block
+
+
+def put_bytes(data, kind=BREP):
+    """Copies a bytes-like object into a new shared memory block"""
+    block = _create(len(data))
+    block.buf[:len(data)] = data
+    return ShmHandle(block.name, kind, len(data))
+
+
+def put_shape(shape):
+    """Serializes a CadQuery Shape (or Workplane) to BREP in shared memory"""
+    shape = shape.val() if hasattr(shape, "val") else shape
+    stream = io.BytesIO()
+    shape.exportBrep(stream)
+    return put_bytes(stream.getbuffer(), BREP)
+
+
+def put_mesh(vertices, triangles):
+    """Copies vertex and triangle arrays into one shared memory block"""
+    vertices = np.ascontiguousarray(vertices, dtype=VERTEX_DTYPE).reshape(-1, 3)
+    triangles = np.ascontiguousarray(triangles, dtype=TRIANGLE_DTYPE).reshape(-1, 3)
+    size = vertices.nbytes + triangles.nbytes
+    block = _create(size)
+    np.ndarray(vertices.shape, VERTEX_DTYPE, block.buf)[:] = vertices
+    np.ndarray(triangles.shape, TRIANGLE_DTYPE, block.buf, vertices.nbytes)[:] = triangles
+    return ShmHandle(block.name, MESH, size, len(vertices), len(triangles))
+
+
+def tessellate(shape, tolerance=MESH_TOLERANCE):
+    """Tessellates a shape into (vertices, triangles) NumPy arrays"""
+    shape = shape.val() if hasattr(shape, "val") else shape
+    points, triangles = shape.tessellate(tolerance)
+    vertices = np.array([point.toTuple() for point in points], dtype=VERTEX_DTYPE)
+    return vertices.reshape(-1, 3), np.array(triangles, dtype=TRIANGLE_DTYPE).reshape(-1, 3)
+
+
+def _attach(handle):
+    return shared_memory.SharedMemory(name=handle.name)
+
+
+def take_bytes(handle):
+    """Returns the block's contents as bytes and unlinks the block"""
+    block = _attach(handle)
+    try:
+        return bytes(block.buf[:handle.size])
+    finally:
+        block.close()
+        block.unlink()
+
+
+def take_shape(handle):
+    """Rebuilds the CadQuery Shape from a BREP handle and unlinks the block"""
+    import cadquery as cq
+
+    block = _attach(handle)
+    try:
+        with block.buf[:handle.size] as view:
+            return cq.Shape.importBrep(io.BytesIO(view))
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _mesh_views(block, handle):
+    vertices = np.ndarray((handle.vertex_count, 3), VERTEX_DTYPE, block.buf)
+    triangles = np.ndarray((handle.triangle_count, 3), TRIANGLE_DTYPE, block.buf,
+                           vertices.nbytes)
+    return vertices, triangles
+
+
+@contextmanager
+def open_mesh(handle):
+    """Yields zero-copy (vertices, triangles) views of a mesh handle
+
+    The views are only valid inside the with-block; the shared memory is
+    unlinked on exit.
+    """
+    block = _attach(handle)
+    try:
+        yield _mesh_views(block, handle)
+    finally:
+        block.unlink()
+        try:
+            block.close()
+        except BufferError:
+            # Views are still referenced; the mapping goes away with them
+            pass
+
+
+def take_mesh(handle):
+    """Copies a mesh handle into private arrays and unlinks the block"""
+    with open_mesh(handle) as (vertices, triangles):
+        return vertices.copy(), triangles.copy()
+
+
+def build_shape_shm(spec):
+    """Sandbox task: builds a ConnectorSpec and returns a BREP handle"""
+    return put_shape(spec.build())
+
+
+def build_mesh_shm(spec, tolerance=MESH_TOLERANCE, lod=None):
+    """Sandbox task: builds a ConnectorSpec and returns a mesh handle
+
+    Pass lod=connector_models.LOD_PROXY for a quick preview mesh.
+    """
+    return put_mesh(*tessellate(spec.build(lod), tolerance))
+
+
+def _synthetic_mesh(vertex_count):
+    vertices = np.random.default_rng(0).random((vertex_count, 3), dtype=VERTEX_DTYPE)
+    triangles = np.arange(vertex_count, dtype=TRIANGLE_DTYPE).reshape(-1, 3)
+    return vertices, triangles
+
+
+def _mesh_over_pipe(vertex_count):
+    return _synthetic_mesh(vertex_count)
+
+
+def _mesh_over_shm(vertex_count):
+    return put_mesh(*_synthetic_mesh(vertex_count))
+
+
+def main(argv=None):
+    """Times mesh transfer from a sandbox worker through the pipe and through
+    shared memory"""
+    import argparse
+    import sys
+
+    from sandbox import Sandbox
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--parts", type=int, default=20)
+    parser.add_argument("--vertices", type=int, default=1_500_000)
+    args = parser.parse_args(argv)
+
+    with Sandbox(max_jobs=args.parts * 2 + 1) as sandbox:
+        sandbox.run(_mesh_over_pipe, 3)  # Start the worker outside the timing
+        for label, task in (("pipe", _mesh_over_pipe), ("shared memory", _mesh_over_shm)):
+            start = time.perf_counter()
+            for _ in range(args.parts):
+                result = sandbox.run(task, args.vertices)
+                if not result.ok:
+                    raise RuntimeError(result.error)
+                if task is _mesh_over_shm:
+                    with open_mesh(result.value) as (vertices, triangles):
+                        triangles[-1].sum()
+                else:
+                    result.value[1][-1].sum()
+            elapsed = time.perf_counter() - start
+            sys.stdout.write(f"{label}: {elapsed / args.parts * 1000:.1f} ms per part\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Deterministic STEP output
+
+OCC's STEP writer stamps the export time into the header, numbers products
+with a per-process counter and numbers entities in whatever order the
+translator visits them. canonicalize() rewrites a STEP file so its bytes
+depend only on the geometry: fixed header values, entities renumbered in a
+content-derived order, one entity per line and, optionally, real numbers
+rounded to a fixed number of significant digits.
+"""
+import hashlib
+import os
+import re
+
+import cadquery as cq
+
+# Bump whenever canonicalize() output changes for the same input
+FORMAT_VERSION = 1
+
+# Written in place of the export time so identical shapes give identical files
+FIXED_TIMESTAMP = "1970-01-01T00:00:00"
+
+_FILE_NAME_TIMESTAMP = re.compile(r"(FILE_NAME\('(?:[^']|'')*',\s*')[^']*(')")
+
+# OCC numbers each translated product within a process ("... translator 7.9 3")
+_TRANSLATOR_COUNTER = re.compile(r"(Open CASCADE STEP translator [\d.]+) \d+")
+
+_STRING = re.compile(r"'((?:[^']|'')*)'")
+_HEX_STRING = re.compile(r"'([0-9a-f]*)'")
+_ENTITY = re.compile(r"#(\d+)=(.*)", re.S)
+_REFERENCE = re.compile(r"#(\d+)")
+_SEPARATING_SPACE = re.compile(r"(?<=[\w.])\s+(?=[\w.])")
+_WHITESPACE = re.compile(r"\s+")
+_REAL = re.compile(r"(?<![\w#.])[-+]?\d+\.\d*(?:E[-+]?\d+)?")
+
+
+def stabilize_header(text):
+    """Removes the export timestamp and per-process counters from STEP text"""
+    text = _FILE_NAME_TIMESTAMP.sub(rf"\g<1>{FIXED_TIMESTAMP}\g<2>", text, count=1)
+    return _TRANSLATOR_COUNTER.sub(r"\1", text)
+
+
+def _hide_strings(data):
+    # Hex-encoding string contents means no later regex (references, reals,
+    # whitespace, semicolons) can match inside a string
+    return _STRING.sub(lambda m: "'" + m.group(1).encode("latin-1").hex() + "'", data)
+
+
+def _restore_strings(data):
+    return _HEX_STRING.sub(
+        lambda m: "'" + bytes.fromhex(m.group(1)).decode("latin-1") + "'", data)
+
+
+def _squeeze(data):
+    # Whitespace between tokens is insignificant; keep one space only where
+    # it separates two word characters, so line wrapping never matters
+    return _WHITESPACE.sub("", _SEPARATING_SPACE.sub(" ", data))
+
+
+def _format_real(value, precision):
+    number = float(value)
+    if number == 0:
+        return "0."
+    text = f"{number:.{precision}G}"
+    mantissa, _, exponent = text.partition("E")
+    if "." not in mantissa:
+        mantissa += "."
+    return f"{mantissa}E{exponent}" if exponent else mantissa
+
+
+def _parse_entities(data):
+    """Splits a prepared DATA section into {id: body}"""
+    entities = {}
+    for statement in data.split(";"):
+        match = _ENTITY.match(statement)
+        if match:
+            entities[int(match.group(1))] = match.group(2)
+    return entities
+
+
+def _content_hashes(entities, references):
+    """Hashes each entity together with everything it references
+
+    Cyclic references (rare in OCC output) fall back to hashing the
+    referenced entity's own text.
+    """
+    local = {key: hashlib.sha1(_REFERENCE.sub("#", body).encode()).hexdigest()
+             for key, body in entities.items()}
+    hashes = {}
+    for root in entities:
+        if root in hashes:
+            continue
+        stack = [(root, False)]
+        visiting = set()
+        while stack:
+            key, expanded = stack.pop()
+            if key in hashes:
+                continue
+            if expanded:
+                visiting.discard(key)
+                child_hashes = [hashes.get(ref, local.get(ref, "")) for ref in references[key]]
+                hashes[key] = hashlib.sha1(
+                    (local[key] + "|" + ",".join(child_hashes)).encode()).hexdigest()
+                continue
+            visiting.add(key)
+            stack.append((key, True))
+            for ref in reversed(references[key]):
+                if ref in entities and ref not in hashes and ref not in visiting:
+                    stack.append((ref, False))
+    return hashes
+
+
+def _canonical_order(entities, references, hashes):
+    """Numbers entities depth-first from the unreferenced roots, taking
+    roots in content-hash order and children in the order they are cited"""
+    referenced = {ref for refs in references.values() for ref in refs}
+    roots = sorted((key for key in entities if key not in referenced),
+                   key=lambda key: (hashes[key], entities[key]))
+    # Anything only reachable through a cycle is picked up afterwards
+    rest = sorted(entities, key=lambda key: (hashes[key], entities[key]))
+
+    order = {}
+    for root in roots + rest:
+        stack = [root]
+        while stack:
+            key = stack.pop()
+            if key in order or key not in entities:
+                continue
+            order[key] = len(order) + 1
+            stack.extend(reversed(references[key]))
+    return order
+
+
+def canonicalize(text, precision=None):
+    """Rewrites STEP text into a deterministic form
+
+    Args:
+        text: Contents of a STEP (ISO 10303-21) file
+        precision: Significant digits for real numbers, or None to keep
+            the values as written
+
+    Returns:
+        The canonical STEP text
+    """
+    text = stabilize_header(text)
+    data_start = text.index("DATA;") + len("DATA;")
+    data_end = text.rindex("ENDSEC;")
+    header = text[:data_start]
+    footer = text[data_end:]
+
+    data = _squeeze(_hide_strings(text[data_start:data_end]))
+    if precision is not None:
+        data = _REAL.sub(lambda m: _format_real(m.group(0), precision), data)
+
+    entities = _parse_entities(data)
+    references = {key: [int(ref) for ref in _REFERENCE.findall(body)]
+                  for key, body in entities.items()}
+    order = _canonical_order(entities, references, _content_hashes(entities, references))
+
+    def renumber(match):
+        return f"#{order[int(match.group(1))]}"
+
+    lines = [f"#{order[key]}={_REFERENCE.sub(renumber, body)};"
+             for key, body in sorted(entities.items(), key=lambda item: order[item[0]])]
+    return header + "\n" + _restore_strings("\n".join(lines)) + "\n" + footer
+
+
+def export_step(shape, filename, precision=None):
+    """Exports a STEP file whose bytes depend only on the geometry
+
+    Args:
+        shape: CadQuery Workplane or Shape
+        filename: Full output file name, including extension
+        precision: Significant digits for real numbers (None keeps OCC's)
+
+    Returns:
+        The file name written
+    """
+    temporary = f"{filename}.tmp"
+    cq.exporters.export(shape, temporary, exportType="STEP")
+    with open(temporary, encoding="latin-1") as f:
+        text = canonicalize(f.read(), precision)
+    with open(temporary, "w", encoding="latin-1", newline="\n") as f:
+        f.write(text)
+    os.replace(temporary, filename)
+    return filename
@@ -0,0 +1,95 @@
+import math
+
+import cadquery as cq
+
+from assembly_planner import HUB, classify_joint, plan_structure
+from connector_models import ConnectorGenerator
+
+
+def _structure():
+    """A 3x3 grid of 20x10 boards, a 45 degree bend and a joint of two sections"""
+    nodes = [{"id": f"g{i}{j}", "position": [i * 100, j * 100]}
+             for i in range(3) for j in range(3)]
+    boards = []
+    for i in range(3):
+        for j in range(3):
+            # Float noise in the structure file must not split identical parts
+            thickness = 10.00001 if (i + j) % 2 else 10
+            if i < 2:
+                boards.append({"from": f"g{i}{j}", "to": f"g{i + 1}{j}",
+                               "width": 20, "thickness": thickness})
+            if j < 2:
+                boards.append({"from": f"g{i}{j}", "to": f"g{i}{j + 1}",
+                               "width": 20, "thickness": thickness})
+
+    offset = 100 / math.sqrt(2)
+    nodes += [{"id": "b0", "position": [1000, 0]}, {"id": "b1", "position": [1100, 0]},
+              {"id": "b2", "position": [1100 + offset, offset]}]
+    boards += [{"from": "b0", "to": "b1", "width": 20, "thickness": 10},
+               {"from": "b1", "to": "b2", "width": 20, "thickness": 10}]
+
+    nodes += [{"id": "m0", "position": [2000, 0]}, {"id": "m1", "position": [2100, 0]},
+              {"id": "m2", "position": [2200, 0]}]
+    boards += [{"from": "m0", "to": "m1", "width": 20, "thickness": 10},
+               {"from": "m1", "to": "m2", "width": 30, "thickness": 10}]
+    return {"nodes": nodes, "boards": boards}
+
+
+def test_classify_joint():
+    x, y, z = [1, 0, 0], [0, 1, 0], [0, 0, 1]
+    minus_x, minus_y = [-1, 0, 0], [0, -1, 0]
+    diagonal = [math.sqrt(0.5), math.sqrt(0.5), 0]
+    assert classify_joint([x]) is None
+    assert classify_joint([x, minus_x]) == "end_to_end"
+    assert classify_joint([x, y]) == "angle"
+    assert classify_joint([x, diagonal]) == HUB
+    assert classify_joint([x, minus_x, y]) == "t_conn"
+    assert classify_joint([x, y, z]) == HUB
+    assert classify_joint([x, minus_x, y, minus_y]) == "cross"
+    assert classify_joint([x, minus_x, y, z, minus_y]) == HUB
+
+
+def test_plan_groups_identical_connectors():
+    plan = plan_structure(_structure())
+    assert plan.counts() == {"angle": 4, "t_conn": 4, "cross": 1, HUB: 2}
+    assert plan.joint_count == 11
+    assert sorted(plan.free_ends) == ["b0", "b2", "m0", "m2"]
+
+    # One part per connector type in the grid, despite the thickness noise
+    grid = [part for part in plan.parts if part.connector_type != HUB]
+    assert [(part.connector_type, part.count) for part in grid] == [
+        ("angle", 4), ("t_conn", 4), ("cross", 1)]
+    assert all(part.spec.board_thickness == 10 for part in grid)
+
+
+def test_mixed_sections_need_a_hub():
+    plan = plan_structure(_structure())
+    hubs = {part.nodes[0]: part for part in plan.parts if part.connector_type == HUB}
+    assert set(hubs) == {"b1", "m1"}
+    # The hub takes the larger section
+    assert hubs["m1"].spec.board_width == 30
+    assert not hubs["m1"].buildable
+
+    rows = plan.bill_of_materials()
+    assert [row["buildable"] for row in rows].count(False) == 2
+    assert sum(row["quantity"] for row in rows) == plan.joint_count
+
+
+def test_overrides_take_precedence():
+    structure = dict(_structure(), wall_thickness=2)
+    plan = plan_structure(structure, add_ribs=True)
+    assert all(part.spec.wall_thickness == 2 and part.spec.add_ribs for part in plan.parts)
+
+
+def test_generate_builds_each_part_once(tmp_path, monkeypatch):
+    built = []
+
+    def create_connector(self, connector_type, **parameters):
+        built.append(connector_type)
+        return cq.Workplane("XY").box(1, 1, 1)
+
+    monkeypatch.setattr(ConnectorGenerator, "create_connector", create_connector)
+    files = plan_structure(_structure()).generate(tmp_path)
+    assert sorted(built) == ["angle", "cross", "t_conn"]
+    assert len(files) == 3
+    assert all(path.endswith(".step") and (tmp_path / path).exists() for path in files.values())
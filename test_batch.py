@@ -0,0 +1,93 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import batch
+from batch import CRASHED, DONE, FAILED, QUARANTINED, Manifest, output_path, run_batch
+from connector_spec import ConnectorSpec
+from mesh_store import MeshStore
+
+SPEC = ConnectorSpec(20, 10, 30)
+
+
+def _fail(*args, **kwargs):
+    raise RuntimeError("boolean operation failed")
+
+
+def test_resume_skips_finished_parts(tmp_path, monkeypatch):
+    assert run_batch([SPEC], tmp_path)[DONE] == 1
+
+    monkeypatch.setattr(batch, "build_and_export", _fail)
+    summary = run_batch([SPEC], tmp_path)
+    assert summary["skipped"] == 1 and summary[FAILED] == 0
+
+
+def test_checksum_mismatch_rebuilds(tmp_path):
+    run_batch([SPEC], tmp_path)
+    path = output_path(SPEC, tmp_path)
+    original = path.read_bytes()
+    path.write_bytes(original[:-100])
+
+    summary = run_batch([SPEC], tmp_path)
+    assert summary[DONE] == 1 and summary["skipped"] == 0
+    assert path.read_bytes() == original
+
+
+def test_failures_are_quarantined(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "build_and_export", _fail)
+    monkeypatch.setattr(batch, "run_isolated",
+                        lambda *args: (FAILED, {"error": "RuntimeError: boolean operation failed"}))
+
+    for _ in range(batch.MAX_ATTEMPTS):
+        assert run_batch([SPEC], tmp_path)[FAILED] == 1
+    assert run_batch([SPEC], tmp_path)[QUARANTINED] == 1
+    # Quarantined jobs stay quarantined without another attempt
+    assert run_batch([SPEC], tmp_path)[QUARANTINED] == 1
+
+    manifest = Manifest(tmp_path / "manifest.jsonl")
+    assert manifest.status(SPEC.digest) == QUARANTINED
+    assert manifest.failures(SPEC.digest) == batch.MAX_ATTEMPTS
+
+
+def test_manifest_survives_interrupted_runs(tmp_path):
+    path = tmp_path / "manifest.jsonl"
+    manifest = Manifest(path)
+    manifest.record("a", batch.STARTED, attempt=1)
+    manifest.record("a", batch.STARTED, attempt=2)
+    with open(path, "a") as f:
+        f.write(json.dumps({"spec_hash": "a", "status": DONE})[:20])
+
+    # Two "started" lines never followed up are two crashed attempts
+    manifest = Manifest(path)
+    assert manifest.status("a") == CRASHED
+    assert manifest.failures("a") == 2
+
+
+def test_resume_restores_meshes_lost_in_a_crash(tmp_path):
+    specs = [SPEC, SPEC.replace(add_screw_holes=True)]
+    # The second part kills the process before the store's index is written
+    script = textwrap.dedent(f"""
+        import os
+        import batch
+        from connector_spec import ConnectorSpec
+
+        build_and_export = batch.build_and_export
+
+        def crash(spec, *args):
+            if spec.add_screw_holes:
+                os._exit(139)
+            return build_and_export(spec, *args)
+
+        batch.build_and_export = crash
+        specs = [ConnectorSpec.from_json(line) for line in {[s.to_json() for s in specs]!r}]
+        batch.run_batch(specs, {str(tmp_path)!r}, mesh_dir={str(tmp_path / "meshes")!r})
+    """)
+    process = subprocess.run([sys.executable, "-c", script], cwd=os.path.dirname(batch.__file__))
+    assert process.returncode == 139
+
+    summary = run_batch(specs, tmp_path, mesh_dir=tmp_path / "meshes")
+    assert summary["skipped"] == 1 and summary[DONE] == 1
+    store = MeshStore(tmp_path / "meshes")
+    assert all(spec in store for spec in specs)
@@ -0,0 +1,40 @@
+import pytest
+
+from calibration import CalibrationPlate, tolerance_sweep
+
+
+def test_tolerance_sweep():
+    assert tolerance_sweep(0.1, 0.3, 0.1) == [0.1, 0.2, 0.3]
+    assert tolerance_sweep(0.2, 0.2, 0.05) == [0.2]
+    for step in (0, -0.05):
+        with pytest.raises(ValueError):
+            tolerance_sweep(0.0, 0.6, step)
+    with pytest.raises(ValueError):
+        tolerance_sweep(0.6, 0.0, 0.05)
+
+
+def _slot_width(solid):
+    """Distance between the slot's side faces, which face along Y inside the sleeve"""
+    box = solid.BoundingBox()
+    sides = [face.Center().y for face in solid.Faces()
+             if abs(abs(face.normalAt().y) - 1) < 1e-9
+             and box.ymin + 1e-6 < face.Center().y < box.ymax - 1e-6]
+    return max(sides) - min(sides)
+
+
+def test_plate_layout():
+    tolerances, walls = [0.1, 0.3], [2, 3]
+    plate = CalibrationPlate(6, strip_width=10, label=False)
+    solids = plate.build(tolerances, walls).val().Solids()
+    # One tab plus one coupon per tolerance in every row
+    assert len(solids) == len(walls) * (len(tolerances) + 1)
+
+    rows = [solids[i:i + len(tolerances) + 1] for i in range(0, len(solids), len(tolerances) + 1)]
+    for row, wall in zip(rows, walls):
+        tab, coupons = row[0], row[1:]
+        assert len(tab.Faces()) == 6
+        for coupon, tolerance in zip(coupons, tolerances):
+            assert _slot_width(coupon) == pytest.approx(10 + tolerance)
+            assert coupon.BoundingBox().ylen == pytest.approx(10 + wall * 2)
+    # The sleeve is built once per wall, not per coupon
+    assert sorted(plate._templates) == walls
@@ -0,0 +1,109 @@
+import sys
+from importlib.metadata import EntryPoint
+
+import pytest
+
+import connector_registry
+from connector_models import ConnectorGenerator
+from connector_registry import ConnectorType, Registry
+from connector_spec import ConnectorSpec
+from validation import check_parameters
+
+PLUGIN_TYPES = """
+from connector_registry import ConnectorType, Parameter
+
+SLEEVE = ConnectorType("sleeve", "Sleeve", "plugin_geometry:build_sleeve",
+                       features=(), parameters=(Parameter("length", "Length", 10.0, 0),))
+"""
+
+PLUGIN_GEOMETRY = """
+import cadquery as cq
+
+def build_sleeve(generator, length):
+    return cq.Workplane("XY").box(length, generator.board_width, generator.board_thickness)
+"""
+
+
+@pytest.fixture
+def plugin(tmp_path, monkeypatch):
+    (tmp_path / "plugin_types.py").write_text(PLUGIN_TYPES)
+    (tmp_path / "plugin_geometry.py").write_text(PLUGIN_GEOMETRY)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    group = "test.connector_types"
+    entry_point = EntryPoint("sleeve", "plugin_types:SLEEVE", group)
+    monkeypatch.setattr(connector_registry, "entry_points",
+                        lambda group: [entry_point] if group == entry_point.group else [])
+    yield Registry(group)
+    for name in ("plugin_types", "plugin_geometry"):
+        sys.modules.pop(name, None)
+
+
+def test_builtin_types():
+    assert connector_registry.names()[:4] == ["end_to_end", "angle", "t_conn", "cross"]
+    assert "angle" in connector_registry.registry
+    assert not connector_registry.get("angle").supports("add_taper")
+    with pytest.raises(ValueError):
+        connector_registry.get("dovetail")
+
+
+def test_entry_points_load_lazily(plugin):
+    assert plugin.names() == ["sleeve"]
+    assert "plugin_types" not in sys.modules
+
+    sleeve = plugin.get("sleeve")
+    assert "plugin_types" in sys.modules
+    assert "plugin_geometry" not in sys.modules
+
+    shape = sleeve.build(ConnectorGenerator(20, 10, 30), length=15, angle=45)
+    assert "plugin_geometry" in sys.modules
+    assert shape.val().Volume() == pytest.approx(15 * 20 * 10)
+
+
+def test_duplicate_names_rejected():
+    registry = Registry("test.empty")
+    registry.register(ConnectorType("box", "Box", "create_single_slot_segment"))
+    with pytest.raises(ValueError):
+        registry.register(ConnectorType("box", "Box", "create_corner_segment"))
+
+
+def test_parameters_reach_the_builder():
+    generator = ConnectorGenerator(20, 10, 30)
+    assert generator.create_connector("angle", angle=90).val().isValid()
+    with pytest.raises(ValueError):
+        generator.create_connector("angle", angle=45)
+    # Only the supported angle is accepted, when the spec is made
+    with pytest.raises(ValueError, match="90 degrees"):
+        ConnectorSpec(20, 10, 30, connector_type="angle", parameters={"angle": 60})
+    assert connector_registry.get("angle").parameters[0].check("90") == 90
+
+
+def test_plugin_parameters_reach_every_build_path(plugin, tmp_path, monkeypatch):
+    from export_cache import ExportCache
+
+    monkeypatch.setitem(connector_registry.registry._types, "sleeve", plugin.get("sleeve"))
+    short = ConnectorSpec(20, 10, 30, connector_type="sleeve", parameters={"length": 15})
+    long = short.replace(parameters={"length": 40})
+    assert short.digest != long.digest
+    assert ConnectorSpec.from_bytes(long.to_bytes()) == long
+    assert ConnectorSpec.from_json(long.to_json()) == long
+
+    cache = ExportCache(tmp_path)
+    cache.export(short, tmp_path / "short.step")
+    cache.export(long, tmp_path / "long.step")
+    assert not (tmp_path / "short.step").samefile(tmp_path / "long.step")
+    assert long.build().val().Volume() == pytest.approx(40 * 20 * 10)
+
+
+def test_unsupported_features_are_masked():
+    spec = ConnectorSpec(20, 10, 30, add_taper=True, add_ribs=True, add_screw_holes=True,
+                         connector_type="angle")
+    assert not spec.add_taper and spec.add_ribs and not spec.add_screw_holes
+    assert spec == ConnectorSpec(20, 10, 30, add_ribs=True, connector_type="angle")
+    assert spec.replace(connector_type="end_to_end").parameters == ()
+
+
+def test_validation_uses_declared_features():
+    generator = ConnectorGenerator(20, 10, 30, add_taper=True)
+    messages = [issue.message for issue in check_parameters(generator, "angle").issues]
+    assert "create_corner_segment ignores add_taper" in messages
+    assert not check_parameters(generator, "end_to_end").issues
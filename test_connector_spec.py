@@ -0,0 +1,50 @@
+import pickle
+
+import pytest
+
+from connector_spec import ConnectorSpec
+
+
+def test_float_noise_is_normalized():
+    a = ConnectorSpec(100, 10, 50, tolerance=0.2)
+    b = ConnectorSpec(100.0, 10.0000000001, 50, tolerance=0.20000001)
+    assert a == b
+    assert hash(a) == hash(b)
+    assert a.digest == b.digest
+
+
+def test_different_specs_differ():
+    a = ConnectorSpec(100, 10, 50)
+    assert a.digest != a.replace(add_ribs=True).digest
+    assert a.digest != a.replace(connector_type="cross").digest
+
+
+def test_round_trips():
+    spec = ConnectorSpec(20, 10, 30, 2.5, 0.15, False, True, False,
+                         connector_type="angle", parameters={"angle": 90}, file_format="stl")
+    assert spec.type_parameters() == {"angle": 90.0}
+    assert ConnectorSpec.from_bytes(spec.to_bytes()) == spec
+    assert ConnectorSpec.from_json(spec.to_json()) == spec
+    assert pickle.loads(pickle.dumps(spec)) == spec
+
+
+def test_is_immutable():
+    spec = ConnectorSpec(20, 10, 30)
+    with pytest.raises(AttributeError):
+        spec.board_width = 5
+
+
+def test_rejects_bad_input():
+    with pytest.raises(ValueError):
+        ConnectorSpec(20, 10, 30, file_format="obj")
+    with pytest.raises(ValueError):
+        ConnectorSpec.from_dict({"board_width": 20, "board_thickness": 10,
+                                 "board_depth": 30, "colour": "red"})
+
+
+def test_geometry_digest_ignores_file_format():
+    step = ConnectorSpec(20, 10, 30)
+    stl = step.replace(file_format="STL")
+    assert step.digest != stl.digest
+    assert step.geometry_digest == stl.geometry_digest
+    assert step.geometry_digest != step.replace(add_ribs=True).geometry_digest
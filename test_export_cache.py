@@ -0,0 +1,72 @@
+import export_cache
+from connector_spec import ConnectorSpec
+from export_cache import ExportCache
+
+SPEC = ConnectorSpec(20, 10, 30)
+
+
+def test_formats_share_one_build(tmp_path, monkeypatch):
+    builds = []
+    original = ConnectorSpec.build
+    monkeypatch.setattr(ConnectorSpec, "build",
+                        lambda spec, *args: builds.append(spec) or original(spec, *args))
+    monkeypatch.setattr(export_cache, "_shapes", export_cache.OrderedDict())
+
+    cache = ExportCache(tmp_path / "cache")
+    step = cache.export(SPEC, tmp_path / "part.step")
+    stl = cache.export(SPEC.replace(file_format="STL"), tmp_path / "part.stl")
+    assert len(builds) == 1
+    assert not step.samefile(stl)
+
+    cache.export(SPEC, tmp_path / "again.step")
+    assert len(builds) == 1 and cache.stats["spec_hits"] == 1
+    assert (tmp_path / "again.step").samefile(step)
+
+
+def test_shared_cache_keeps_every_entry(tmp_path):
+    # Two workers opened the cache before either exported
+    first, second = ExportCache(tmp_path / "cache"), ExportCache(tmp_path / "cache")
+    other = SPEC.replace(add_ribs=True)
+    first.export(SPEC, tmp_path / "a.step")
+    second.export(other, tmp_path / "b.step")
+
+    cache = ExportCache(tmp_path / "cache")
+    assert cache.lookup(SPEC) is not None and cache.lookup(other) is not None
+
+
+def test_other_versions_are_not_reused(tmp_path, monkeypatch):
+    ExportCache(tmp_path / "cache").export(SPEC, tmp_path / "part.step")
+    assert ExportCache(tmp_path / "cache").lookup(SPEC) is not None
+
+    monkeypatch.setattr("connector_models.GEOMETRY_VERSION", 1000)
+    assert ExportCache(tmp_path / "cache").lookup(SPEC) is None
+
+
+def test_isolated_export_over_a_link_keeps_the_cache(tmp_path):
+    from file_utils import file_checksum
+    from sandbox import Sandbox, build_and_save
+
+    cache = ExportCache(tmp_path / "cache")
+    output = cache.export(SPEC, tmp_path / "connector_end_to_end.step")
+    other = cache.export(SPEC, tmp_path / "other_end_to_end.step")
+    source = cache.lookup(SPEC)
+    checksum = file_checksum(source)
+
+    ribbed = SPEC.replace(add_ribs=True)
+    with Sandbox(timeout=120) as sandbox:
+        outcome = sandbox.run(build_and_save, ribbed.connector_type,
+                              ribbed.generator_kwargs(), str(output.with_suffix("")))
+    assert outcome.ok
+    assert not output.samefile(source)
+    assert file_checksum(source) == checksum and file_checksum(other) == checksum
+    assert other.samefile(source)
+
+
+def test_export_cached_task_links_through_the_cache(tmp_path):
+    from sandbox import Sandbox
+
+    with Sandbox(timeout=120) as sandbox:
+        outcome = sandbox.run(export_cache.export_cached, SPEC, str(tmp_path / "cache"),
+                              str(tmp_path / "part.step"))
+    assert outcome.ok
+    assert (tmp_path / "part.step").samefile(ExportCache(tmp_path / "cache").lookup(SPEC))
@@ -0,0 +1,110 @@
+"""Geometry regression tests
+
+Builds every connector builder across all feature-flag combinations in
+memory and compares geometric fingerprints against the golden values in
+test_fingerprints.json. Volume, area, bounding box and center are compared
+within tolerance; face and edge counts only loosely, as they vary between
+OCC versions. The cases are independent, so the matrix can be spread over
+CPUs with pytest-xdist (`pytest -n auto test_fingerprints.py`, see
+requirements-dev.txt).
+
+After an intentional geometry change, regenerate the golden values with:
+
+    python test_fingerprints.py --update
+"""
+import itertools
+import json
+import os
+import sys
+
+import pytest
+
+from connector_models import ConnectorGenerator
+from fingerprint import compare_fingerprints, geometric_fingerprint
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_fingerprints.json")
+
+BOARD = {"board_width": 20, "board_thickness": 10, "board_depth": 30}
+
+BUILDERS = [
+    "create_end_to_end_connector",
+    "create_angle_connector",
+    "create_t_connector",
+    "create_cross_connector",
+    "create_single_slot_segment",
+    "create_corner_segment",
+    "create_t_junction_segment",
+    "create_cross_junction_segment",
+]
+
+FLAGS = ("add_taper", "add_ribs", "add_screw_holes")
+
+
+def _cases():
+    for builder in BUILDERS:
+        for values in itertools.product((False, True), repeat=len(FLAGS)):
+            flags = dict(zip(FLAGS, values))
+            name = "-".join([builder] + [flag[4:] for flag in FLAGS if flags[flag]])
+            yield name, builder, flags
+
+
+def _fingerprint_case(builder, flags):
+    """Builds one case, returning its fingerprint or the error it raised"""
+    generator = ConnectorGenerator(**BOARD, **flags)
+    try:
+        segment = getattr(generator, builder)()
+    except Exception as e:
+        return {"error": type(e).__name__}
+    return geometric_fingerprint(segment)
+
+
+def _load_golden():
+    with open(GOLDEN_FILE) as f:
+        return json.load(f)
+
+
+CASES = list(_cases())
+
+
+@pytest.fixture(scope="session")
+def golden():
+    return _load_golden()
+
+
+@pytest.mark.parametrize("name,builder,flags", CASES, ids=[case[0] for case in CASES])
+def test_fingerprint(golden, name, builder, flags):
+    assert name in golden, f"No golden fingerprint for {name}; run with --update"
+    expected = golden[name]
+    actual = _fingerprint_case(builder, flags)
+
+    if "error" in expected or "error" in actual:
+        assert actual == expected
+        return
+
+    differences = compare_fingerprints(actual, expected)
+    assert not differences, "\n".join(differences)
+
+
+def test_topology_counts_are_loose():
+    expected = {"volume": 100.0, "area": 60.0, "bbox": [0, 0, 0, 1, 2, 3],
+                "center": [0.5, 1, 1.5], "faces": 12, "edges": 30, "solids": 1}
+    drifted = dict(expected, faces=14, edges=27)
+    assert not compare_fingerprints(drifted, expected)
+    assert compare_fingerprints(dict(expected, faces=20), expected)
+    assert compare_fingerprints(dict(expected, solids=2), expected)
+    assert compare_fingerprints(dict(expected, volume=101.0), expected)
+
+
+def update_golden():
+    golden = {name: _fingerprint_case(builder, flags) for name, builder, flags in CASES}
+    with open(GOLDEN_FILE, "w") as f:
+        json.dump(golden, f, indent=1, sort_keys=True)
+        f.write("\n")
+    sys.stdout.write(f"Wrote {len(golden)} fingerprints to {GOLDEN_FILE}\n")
+
+
+if __name__ == "__main__":
+    if "--update" in sys.argv:
+        update_golden()
+    else:
+        sys.exit(pytest.main([__file__] + sys.argv[1:]))
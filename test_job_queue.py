@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from batch import DONE, QUARANTINED, STARTED, output_path
+from connector_spec import ConnectorSpec
+from file_utils import file_checksum
+from job_queue import PENDING, JobQueue, main, run_worker, run_workers
+
+SPECS = [ConnectorSpec(20, 10, 30, wall_thickness=wall) for wall in (2, 3, 4, 5)]
+
+
+def test_submit_is_idempotent(tmp_path):
+    with JobQueue(tmp_path / "queue.db") as queue:
+        assert queue.submit(SPECS) == 4
+        assert queue.submit(SPECS[:2] + [SPECS[0].replace(add_ribs=True)]) == 1
+        assert queue.counts()[PENDING] == 5
+
+
+def test_workers_drain_the_queue(tmp_path):
+    with JobQueue(tmp_path / "queue.db") as queue:
+        queue.submit(SPECS)
+    summary = run_workers(2, tmp_path / "queue.db", tmp_path / "output")
+    assert summary[DONE] == 4
+
+    with JobQueue(tmp_path / "queue.db") as queue:
+        assert queue.counts()[DONE] == 4
+        for job in queue.jobs(DONE):
+            spec = ConnectorSpec.from_json(job["spec"])
+            path = output_path(spec, tmp_path / "output")
+            assert job["output"] == path.name
+            assert file_checksum(path) == job["checksum"]
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    with JobQueue(tmp_path / "queue.db", lease_seconds=0.2) as queue:
+        queue.submit(SPECS[:1])
+        stalled = queue.claim("stalled")
+        assert queue.claim("idle") is None
+        time.sleep(0.3)
+
+        stolen = queue.claim("idle")
+        assert stolen.digest == stalled.digest and stolen.attempt == 2
+        # The stalled worker's late result is discarded
+        assert not queue.renew(stalled)
+        assert not queue.complete(stalled, "late.step", "0")
+        assert queue.complete(stolen, "file.step", "1")
+        assert queue.jobs(DONE)[0]["output"] == "file.step"
+
+
+def test_failures_are_retried_then_quarantined(tmp_path):
+    broken = ConnectorSpec(20, 10, 30, wall_thickness=-20)
+    with JobQueue(tmp_path / "queue.db") as queue:
+        queue.submit([broken], max_attempts=2)
+    summary = run_worker(tmp_path / "queue.db", tmp_path / "output", timeout=120)
+    assert summary["failed"] == 2
+
+    with JobQueue(tmp_path / "queue.db") as queue:
+        job, = queue.jobs(QUARANTINED)
+        assert job["attempts"] == 2 and "Standard_DomainError" in job["error"]
+        assert queue.requeue() == 1
+        assert queue.counts()[PENDING] == 1 and queue.counts()[STARTED] == 0
+
+
+def test_metrics_port_needs_a_single_process(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        main(["worker", str(tmp_path / "queue.db"), "--processes", "2",
+              "--metrics-port", "0"])
+    assert "--metrics-port" in capsys.readouterr().err
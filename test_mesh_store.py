@@ -0,0 +1,61 @@
+import json
+
+import numpy as np
+
+from connector_spec import ConnectorSpec
+from mesh_store import INDEX_FILE, VERTICES_FILE, MeshStore
+from metrics import stl_triangle_count
+
+SQUARE = (np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]]), np.array([[0, 1, 2], [0, 2, 3]]))
+TRIANGLE = (np.array([[0, 0, 1], [2, 0, 1], [0, 2, 1]]), np.array([[0, 1, 2]]))
+
+
+def test_parts_round_trip(tmp_path):
+    store = MeshStore(tmp_path)
+    store.add("square", *SQUARE, source="square.step")
+    store.add(ConnectorSpec(20, 10, 30), *TRIANGLE)
+
+    store = MeshStore(tmp_path)
+    vertices, triangles = store.get("square")
+    assert np.array_equal(vertices, SQUARE[0]) and np.array_equal(triangles, SQUARE[1])
+    vertices, _ = store.get(ConnectorSpec(20, 10, 30, file_format="STL"))
+    assert np.array_equal(vertices, TRIANGLE[0])
+    assert store.metadata("square")["source"] == "square.step"
+
+    path = store.export_stl("square", tmp_path / "square.stl")
+    assert stl_triangle_count(path) == 2
+
+
+def test_batch_writes_the_index_once(tmp_path):
+    store = MeshStore(tmp_path)
+    with store.batch():
+        for number in range(5):
+            store.add(str(number), *SQUARE)
+            assert not (tmp_path / INDEX_FILE).exists()
+    assert len(MeshStore(tmp_path)) == 5
+    assert MeshStore(tmp_path).metadata("4")["vertex_offset"] == 16
+
+
+def test_batch_writes_the_index_periodically(tmp_path):
+    store = MeshStore(tmp_path)
+    with store.batch(flush_every=2):
+        for number in range(3):
+            store.add(str(number), *SQUARE)
+        # A process dying now keeps the first two parts
+        assert MeshStore(tmp_path).keys() == ["0", "1"]
+    assert len(MeshStore(tmp_path)) == 3
+
+
+def test_interrupted_append_is_dropped(tmp_path):
+    store = MeshStore(tmp_path)
+    store.add("square", *SQUARE)
+    # Rows written without an index entry, as when a process dies mid-append
+    with open(tmp_path / VERTICES_FILE, "ab") as f:
+        f.write(np.ones((7, 3), np.float32).tobytes())
+    index = json.loads((tmp_path / INDEX_FILE).read_text())
+
+    store = MeshStore(tmp_path)
+    entry = store.add("triangle", *TRIANGLE)
+    assert entry["vertex_offset"] == index["square"]["vertex_count"] == 4
+    assert np.array_equal(store.get("triangle")[0], TRIANGLE[0])
+    assert (tmp_path / VERTICES_FILE).stat().st_size == 7 * 3 * 4
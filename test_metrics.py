@@ -0,0 +1,83 @@
+import io
+import json
+import urllib.request
+
+import cadquery as cq
+
+import metrics
+from batch import run_batch
+from connector_models import ConnectorGenerator
+from connector_spec import ConnectorSpec
+
+
+def test_histogram_rendering():
+    registry = metrics.Metrics()
+    latency = registry.histogram("build_seconds", "Build time", buckets=(0.1, 1))
+    latency.observe(0.05, connector_type="cross")
+    latency.observe(0.5, connector_type="cross")
+    registry.counter("jobs_total", "Jobs").inc(status='say "hi"')
+
+    text = registry.render()
+    assert '# TYPE build_seconds histogram' in text
+    assert 'build_seconds_bucket{connector_type="cross",le="0.1"} 1' in text
+    assert 'build_seconds_bucket{connector_type="cross",le="+Inf"} 2' in text
+    assert 'build_seconds_count{connector_type="cross"} 2' in text
+    assert 'jobs_total{status="say \\"hi\\""} 1' in text
+
+
+def test_boolean_ops_are_counted():
+    generator = ConnectorGenerator(20, 10, 30, add_ribs=True)
+    with metrics.count_boolean_ops() as first:
+        generator.create_connector("end_to_end")
+    with metrics.count_boolean_ops() as second:
+        generator.create_connector("end_to_end")
+    assert first["count"] == second["count"] == 2  # Slot cut and rib union
+
+    # Geometry outside the generator is not counted
+    with metrics.count_boolean_ops() as other:
+        cq.Workplane("XY").box(2, 2, 2).cut(cq.Workplane("XY").box(1, 1, 1))
+    assert other["count"] == 0
+
+
+def test_batch_records_jobs(tmp_path, monkeypatch):
+    registry = metrics.standard_metrics()
+    monkeypatch.setattr(metrics, "METRICS", registry)
+    specs = [ConnectorSpec(20, 10, 30, file_format="STL"),
+             ConnectorSpec(20, 10, 30, connector_type="cross", wall_thickness=-20)]
+    stream = io.StringIO()
+    run_batch(specs, tmp_path, json_log=metrics.JsonLog(stream), max_attempts=1)
+
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [event["status"] for event in events] == ["done", "failed"]
+    assert events[0]["triangles"] > 0 and events[0]["boolean_ops"] >= 1
+    assert "Standard_DomainError" in events[1]["error"]
+
+    jobs = registry["connector_jobs_total"]
+    assert jobs.get(connector_type="end_to_end", status="done") == 1
+    assert jobs.get(connector_type="cross", status="failed") == 1
+    assert registry["connector_build_seconds"].count(connector_type="end_to_end") == 1
+    assert registry["connector_triangles"].count(connector_type="end_to_end") == 1
+
+
+def test_cached_batch_times_builds(tmp_path, monkeypatch):
+    registry = metrics.standard_metrics()
+    monkeypatch.setattr(metrics, "METRICS", registry)
+    spec = ConnectorSpec(20, 10, 30, wall_thickness=2.5)
+    run_batch([spec], tmp_path / "first", cache_dir=tmp_path / "cache")
+    run_batch([spec], tmp_path / "second", cache_dir=tmp_path / "cache")
+
+    # Only the miss built the part; both exports are timed
+    assert registry["connector_build_seconds"].count(connector_type="end_to_end") == 1
+    assert registry["connector_export_seconds"].count(connector_type="end_to_end") == 2
+
+
+def test_endpoint_serves_metrics():
+    server = metrics.serve(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            text = response.read().decode()
+    finally:
+        server.shutdown()
+    assert "process_resident_memory_bytes " in text
+    assert "# TYPE connector_jobs_total counter" in text
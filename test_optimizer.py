@@ -0,0 +1,56 @@
+import pytest
+
+from connector_spec import ConnectorSpec
+from optimizer import _verify, estimate, optimize, wall_grid
+
+BASE = ConnectorSpec(20, 10, 30)
+
+
+@pytest.mark.parametrize("connector_type, holes", [
+    ("end_to_end", False), ("end_to_end", True), ("t_conn", False), ("cross", False)])
+def test_estimates_match_real_builds(connector_type, holes):
+    spec = BASE.replace(connector_type=connector_type, wall_thickness=2.5,
+                        add_screw_holes=holes)
+    volume, modulus = estimate(spec, [2.5], holes=holes)
+    measured = _verify(spec.to_json())
+    assert measured["volume"] == pytest.approx(volume[0], rel=1e-3)
+    assert measured["section_modulus"] == pytest.approx(modulus[0], rel=1e-3)
+
+
+def test_finds_lightest_stiff_enough_connector():
+    result = optimize(BASE, 700, min_wall=1.0, walls=wall_grid(0.5, 6, 0.01), top=2,
+                      max_workers=1)
+    # Ribs fill the slot, so only screw holes are searched alongside walls
+    assert result.evaluated == 2 * 551
+    assert not any(candidate.spec.add_ribs for candidate in result.verified)
+    best = result.best
+    assert best.verified and best.measured_section_modulus >= 700 * 0.999
+    # A wall one step thinner would not be stiff enough
+    _, thinner = estimate(BASE, [best.spec.wall_thickness - 0.01],
+                          holes=best.spec.add_screw_holes)
+    assert thinner[0] < 700
+
+
+def test_minimum_wall_prunes_candidates():
+    result = optimize(BASE, 1, min_wall=4, walls=wall_grid(1, 5, 0.1), top=1, max_workers=1)
+    assert result.best.spec.wall_thickness - BASE.tolerance / 2 >= 4
+
+
+def test_types_without_estimates_are_rejected():
+    with pytest.raises(ValueError):
+        optimize(BASE.replace(connector_type="angle"), 100)
+
+
+def test_verification_builds_once(monkeypatch):
+    import connector_models
+
+    builds = []
+    create = connector_models.ConnectorGenerator.create_connector
+
+    def counting(self, *args, **kwargs):
+        builds.append(args)
+        return create(self, *args, **kwargs)
+
+    monkeypatch.setattr(connector_models.ConnectorGenerator, "create_connector", counting)
+    measured = _verify(BASE.replace(wall_thickness=2.5).to_json())
+    assert measured["ok"] and len(builds) == 1
@@ -0,0 +1,59 @@
+import pytest
+
+import connector_registry
+from connector_models import LOD_FULL, LOD_PROXY, ConnectorGenerator
+from connector_registry import ConnectorType, Parameter
+from connector_spec import ConnectorSpec
+
+TYPES = ["end_to_end", "angle", "t_conn", "cross"]
+
+
+def _bounds(shape):
+    box = shape.BoundingBox()
+    return box.xmin, box.ymin, box.zmin, box.xmax, box.ymax, box.zmax
+
+
+@pytest.mark.parametrize("connector_type", TYPES)
+def test_proxy_covers_full_part(connector_type):
+    generator = ConnectorGenerator(20, 10, 30, add_taper=True, add_ribs=True,
+                                   add_screw_holes=True)
+    full = _bounds(generator.create_connector(connector_type).val())
+    proxy = _bounds(generator.create_connector(connector_type, lod=LOD_PROXY).val())
+    assert all(p <= f + 1e-6 for p, f in zip(proxy[:3], full[:3]))
+    assert all(p >= f - 1e-6 for p, f in zip(proxy[3:], full[3:]))
+
+
+def test_features_become_boxes():
+    plain = ConnectorGenerator(20, 10, 30).create_proxy("t_conn").val()
+    ribbed = ConnectorGenerator(20, 10, 30, add_ribs=True).create_proxy("t_conn").val()
+    assert len(plain.Solids()) == 1
+    assert len(ribbed.Solids()) == 5
+    # The shell is cached and shared between proxies with the same dimensions
+    assert plain.Solids()[0].isSame(ribbed.Solids()[0])
+
+
+def test_unsupported_features_are_not_shown():
+    generator = ConnectorGenerator(20, 10, 30, add_taper=True, add_screw_holes=True)
+    assert generator.feature_boxes("angle") == []
+    assert len(generator.create_proxy("angle").val().Solids()) == 1
+
+
+def test_spec_lod():
+    spec = ConnectorSpec(20, 10, 30, add_ribs=True, connector_type="cross")
+    assert len(spec.build(LOD_PROXY).val().Solids()) == 2
+    assert len(spec.build(LOD_FULL).val().Solids()) == 1
+    with pytest.raises(ValueError):
+        spec.build("medium")
+
+
+
+def test_builder_reuse_with_extra_parameters(monkeypatch):
+    # A plugin type reusing a built-in builder, with a parameter of its own
+    sleeve = ConnectorType("long_sleeve", "Long Sleeve", "create_single_slot_segment",
+                           parameters=(Parameter("grip", "Grip", 1.0, 0),))
+    monkeypatch.setitem(connector_registry.registry._types, "long_sleeve", sleeve)
+    generator = ConnectorGenerator(20, 10, 30, add_ribs=True)
+    assert len(generator.feature_boxes("long_sleeve", grip=2.0)) == 1
+    proxy = generator.create_connector("long_sleeve", lod=LOD_PROXY, grip=2.0)
+    assert len(proxy.val().Solids()) == 2
+    assert generator.create_connector("long_sleeve", grip=2.0).val().isValid()
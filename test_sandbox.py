@@ -0,0 +1,99 @@
+import ctypes
+import os
+import sys
+import time
+
+import pytest
+
+from sandbox import CRASHED, ERROR, OK, TIMEOUT, Sandbox, run_trusted
+
+
+# Tasks run in the worker; module-level so they can be pickled
+
+def _pid():
+    return os.getpid()
+
+
+def _exit(code):
+    os._exit(code)
+
+
+def _segfault():
+    ctypes.string_at(0)
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def _allocate(megabytes):
+    return len(bytearray(megabytes * 1024 * 1024))
+
+
+def _raise(message):
+    raise ValueError(message)
+
+
+def test_results_come_back():
+    with Sandbox(timeout=30) as sandbox:
+        result = sandbox.run(_sleep, 0)
+    assert result.status == OK and result.value == 0
+
+
+def test_exceptions_are_reported():
+    with Sandbox(timeout=30) as sandbox:
+        first = sandbox.run(_pid)
+        result = sandbox.run(_raise, "boolean operation failed")
+        # Raising does not cost the worker
+        assert sandbox.run(_pid).value == first.value
+    assert result.status == ERROR
+    assert result.error == "boolean operation failed"
+    assert result.error_type == "ValueError"
+    assert "ValueError" in result.traceback
+    assert result.to_dict()["error_type"] == "ValueError"
+
+
+def test_dead_workers_are_reported_and_replaced():
+    with Sandbox(timeout=30) as sandbox:
+        first = sandbox.run(_pid)
+        result = sandbox.run(_exit, 3)
+        assert result.status == CRASHED and result.exitcode == 3
+        second = sandbox.run(_pid)
+    assert second.ok and second.value != first.value
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX signals")
+def test_segfaults_are_reported():
+    with Sandbox(timeout=30) as sandbox:
+        result = sandbox.run(_segfault)
+    assert result.status == CRASHED and result.exitcode == -11
+
+
+def test_slow_jobs_time_out():
+    with Sandbox(timeout=0.5) as sandbox:
+        result = sandbox.run(_sleep, 30)
+        assert result.status == TIMEOUT and result.elapsed < 10
+        # The replacement worker's start-up counts against the timeout too
+        sandbox.timeout = 30
+        assert sandbox.run(_sleep, 0).ok
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX rlimits")
+def test_memory_limit():
+    with Sandbox(timeout=30, memory_limit_mb=1024) as sandbox:
+        result = sandbox.run(_allocate, 4096)
+        assert result.status == ERROR and result.error_type == "MemoryError"
+        assert sandbox.run(_allocate, 16).value == 16 * 1024 * 1024
+
+
+def test_workers_are_recycled():
+    with Sandbox(timeout=30, max_jobs=2) as sandbox:
+        pids = [sandbox.run(_pid).value for _ in range(3)]
+    assert pids[0] == pids[1] != pids[2]
+
+
+def test_run_trusted_reports_like_a_sandbox():
+    assert run_trusted(_sleep, 0).value == 0
+    result = run_trusted(_raise, "bad")
+    assert result.status == ERROR and result.error_type == "ValueError"
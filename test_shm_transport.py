@@ -0,0 +1,62 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+import shm_transport
+from batch import DONE, run_batch
+from connector_spec import ConnectorSpec
+from mesh_store import MeshStore
+from sandbox import Sandbox
+
+SPEC = ConnectorSpec(20, 10, 30)
+
+
+def _is_unlinked(handle):
+    try:
+        shared_memory.SharedMemory(name=handle.name).close()
+    except FileNotFoundError:
+        return True
+    return False
+
+
+def test_bytes_round_trip_and_unlink():
+    handle = shm_transport.put_bytes(b"connector")
+    assert shm_transport.take_bytes(handle) == b"connector"
+    assert _is_unlinked(handle)
+
+
+def test_mesh_from_a_worker():
+    with Sandbox() as sandbox:
+        result = sandbox.run(shm_transport.build_mesh_shm, SPEC)
+        assert result.ok
+        handle = result.value
+        with shm_transport.open_mesh(handle) as (vertices, triangles):
+            assert len(triangles) == handle.triangle_count > 0
+            assert triangles.max() < len(vertices)
+            corner = vertices.max(axis=0)
+        # The block outlives the worker's next task until it is taken
+        assert sandbox.run(shm_transport.put_bytes, b"next").ok
+    assert _is_unlinked(handle)
+    bbox = SPEC.build().val().BoundingBox()
+    assert corner == pytest.approx([bbox.xmax, bbox.ymax, bbox.zmax], abs=1e-3)
+
+
+def test_shape_round_trip():
+    shape = SPEC.build().val()
+    copy = shm_transport.take_shape(shm_transport.put_shape(shape))
+    assert copy.Volume() == pytest.approx(shape.Volume())
+
+
+def test_batch_adds_meshes_through_shared_memory(tmp_path):
+    # The first spec builds in process, the second in the sandbox worker
+    specs = [SPEC, SPEC.replace(add_ribs=True)]
+    run_batch(specs[:1], tmp_path / "output", mesh_dir=tmp_path / "meshes")
+    summary = run_batch(specs, tmp_path / "output", isolate=True, mesh_dir=tmp_path / "meshes")
+    assert summary[DONE] == 1 and summary["skipped"] == 1
+
+    store = MeshStore(tmp_path / "meshes")
+    assert all(spec in store for spec in specs)
+    vertices, triangles = store.get(specs[1])
+    expected, _ = shm_transport.tessellate(specs[1].build())
+    assert np.array_equal(np.asarray(vertices), expected)
@@ -0,0 +1,85 @@
+import os
+import random
+import re
+import subprocess
+import sys
+
+import cadquery as cq
+
+import step_writer
+from connector_models import ConnectorGenerator
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+EXPORT_SCRIPT = """
+import sys
+from connector_models import ConnectorGenerator
+generator = ConnectorGenerator(20, 10, 30, add_ribs=True)
+generator.save_segment(generator.create_t_junction_segment(), sys.argv[1], "STEP",
+                       deterministic=True)
+"""
+
+
+def _generator():
+    return ConnectorGenerator(20, 10, 30, add_ribs=True)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_identical_across_runs(tmp_path):
+    generator = _generator()
+    # A fresh build each time, and the export counter moves on in between
+    first = generator.save_segment(generator.create_t_junction_segment(),
+                                   str(tmp_path / "first"), "STEP", deterministic=True)
+    cq.exporters.export(generator.create_corner_segment(), str(tmp_path / "other.step"))
+    second = generator.save_segment(generator.create_t_junction_segment(),
+                                    str(tmp_path / "second"), "STEP", deterministic=True)
+    assert _read(first) == _read(second)
+
+
+def test_identical_across_processes(tmp_path):
+    paths = []
+    for name in ("a", "b"):
+        subprocess.run([sys.executable, "-c", EXPORT_SCRIPT, str(tmp_path / name)],
+                       cwd=HERE, check=True)
+        paths.append(tmp_path / f"{name}.step")
+    generator = _generator()
+    local = generator.save_segment(generator.create_t_junction_segment(),
+                                   str(tmp_path / "local"), "STEP", deterministic=True)
+    assert _read(paths[0]) == _read(paths[1]) == _read(local)
+
+
+def test_entity_numbering_does_not_matter(tmp_path):
+    generator = _generator()
+    path = str(tmp_path / "plain.step")
+    cq.exporters.export(generator.create_t_junction_segment(), path)
+    with open(path, encoding="latin-1") as f:
+        text = f.read()
+
+    # Give every entity a random new number and shuffle their order
+    data_start = text.index("DATA;") + len("DATA;")
+    data_end = text.rindex("ENDSEC;")
+    statements = re.findall(r"#\d+\s*=.*?;\s*(?=#|$)", text[data_start:data_end], re.S)
+    ids = [int(re.match(r"#(\d+)", s).group(1)) for s in statements]
+    mapping = dict(zip(ids, random.Random(1).sample(range(1, 10 * len(ids)), len(ids))))
+    # (the lookahead skips "#n" inside strings such as 'Context #1')
+    renumbered = [re.sub(r"#(\d+)(?=[\s,);=])", lambda m: f"#{mapping[int(m.group(1))]}", s)
+                  for s in statements]
+    random.Random(2).shuffle(renumbered)
+    shuffled = text[:data_start] + "\n" + "".join(renumbered) + text[data_end:]
+
+    assert step_writer.canonicalize(shuffled) == step_writer.canonicalize(text)
+
+
+def test_precision_rounds_reals(tmp_path):
+    generator = ConnectorGenerator(20.123456789, 10, 30)
+    segment = generator.create_single_slot_segment()
+    path = generator.save_segment(segment, str(tmp_path / "rounded"), "STEP",
+                                  deterministic=True, precision=4)
+    with open(path, encoding="latin-1") as f:
+        text = f.read()
+    assert "13.0617" not in text and "13.06" in text
+    assert abs(cq.importers.importStep(path).val().Volume() - segment.val().Volume()) < 5
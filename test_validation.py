@@ -0,0 +1,57 @@
+from connector_models import ConnectorGenerator
+from validation import ERROR, WARNING, check_geometry, check_parameters, validate, validate_batch
+
+PARAMS = dict(board_width=20, board_thickness=10, board_depth=30)
+
+
+def _checks(result, severity):
+    return {issue.check for issue in result.issues if issue.severity == severity}
+
+
+def test_angle_connector_has_no_clearance():
+    result = check_parameters(ConnectorGenerator(**PARAMS), "create_angle_connector")
+    assert "slot_clearance" in _checks(result, ERROR)
+
+
+def test_cross_connector_slots_stop_short():
+    result = check_parameters(ConnectorGenerator(**PARAMS), "create_cross_connector")
+    assert "slot_reach" in _checks(result, ERROR)
+
+
+def test_thin_walls():
+    thin = check_parameters(ConnectorGenerator(**PARAMS, wall_thickness=1.05), "end_to_end")
+    assert thin.ok and "wall" in _checks(thin, WARNING)
+    broken = check_parameters(ConnectorGenerator(**PARAMS, wall_thickness=0.05), "end_to_end")
+    assert "wall" in _checks(broken, ERROR)
+
+
+def test_hole_wider_than_slot():
+    generator = ConnectorGenerator(4, 10, 30, add_screw_holes=True)
+    result = check_parameters(generator, "create_single_slot_segment")
+    assert "screw_holes" in _checks(result, ERROR)
+    assert check_parameters(ConnectorGenerator(**PARAMS, add_screw_holes=True),
+                            "create_single_slot_segment").ok
+
+
+def test_ribs_block_the_slot():
+    plain = check_geometry(ConnectorGenerator(**PARAMS), "create_single_slot_segment")
+    assert plain.ok and plain.solid_valid and plain.solid_count == 1
+    ribbed = check_geometry(ConnectorGenerator(**PARAMS, add_ribs=True),
+                            "create_single_slot_segment")
+    assert "interference" in _checks(ribbed, ERROR) and ribbed.interference > 0
+
+
+def test_geometry_stage_is_skipped_after_analytic_errors():
+    result = validate(ConnectorGenerator(**PARAMS, wall_thickness=0.05), "end_to_end")
+    assert not result.ok and result.solid_valid is None
+
+
+def test_batch_keeps_input_order():
+    jobs = [("cross", PARAMS), ("create_angle_connector", PARAMS),
+            ("end_to_end", dict(PARAMS, wall_thickness=2)), ("t_conn", PARAMS)]
+    results = validate_batch(jobs, deep=False, max_workers=2)
+    assert [result.builder for result in results] == [
+        "create_cross_junction_segment", "create_angle_connector",
+        "create_single_slot_segment", "create_t_junction_segment"]
+    assert results[2].params["wall_thickness"] == 2
+    assert [result.ok for result in results] == [True, False, True, True]
@@ -0,0 +1,399 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cadquery as cq
+
+import connector_registry
+from connector_models import ConnectorGenerator
+
+# Thinnest wall (mm) we expect to print reliably
+MIN_WALL = 1.0
+
+# Smallest total slot clearance (mm) that still lets a board slide in
+MIN_CLEARANCE = 0.1
+
+# Thinnest rib (mm) worth printing
+MIN_RIB = 0.8
+
+# Screw hole size used by every builder in connector_models
+HOLE_DIAMETER = 5
+
+# Board/connector overlap (mm^3) below which we treat the fit as clean
+INTERFERENCE_EPS = 1e-3
+
+ERROR = "error"
+WARNING = "warning"
+
+
+class Issue:
+    """A single problem found while checking a connector"""
+
+    def __init__(self, check, severity, message):
+        self.check = check
+        self.severity = severity
+        self.message = message
+
+    def to_dict(self):
+        return {"check": self.check, "severity": self.severity, "message": self.message}
+
+    def __repr__(self):
+        return f"Issue({self.check!r}, {self.severity!r}, {self.message!r})"
+
+
+class ValidationResult:
+    """Outcome of validating one connector
+
+    `solid_valid` and `interference` stay None when the geometry stage did
+    not run, either because it was not requested or an analytic check
+    already failed.
+    """
+
+    def __init__(self, builder, params):
+        self.builder = builder
+        self.params = params
+        self.issues = []
+        self.solid_valid = None
+        self.solid_count = None
+        self.interference = None
+        self.elapsed = 0.0
+
+    @property
+    def ok(self):
+        return not any(issue.severity == ERROR for issue in self.issues)
+
+    def add(self, check, severity, message):
+        self.issues.append(Issue(check, severity, message))
+
+    def to_dict(self):
+        return {
+            "builder": self.builder,
+            "params": self.params,
+            "ok": self.ok,
+            "issues": [issue.to_dict() for issue in self.issues],
+            "solid_valid": self.solid_valid,
+            "solid_count": self.solid_count,
+            "interference": self.interference,
+            "elapsed": self.elapsed,
+        }
+
+
+def _params(generator):
+    return {
+        "board_width": generator.board_width,
+        "board_thickness": generator.board_thickness,
+        "board_depth": generator.board_depth,
+        "wall_thickness": generator.wall_thickness,
+        "tolerance": generator.tolerance,
+        "add_taper": generator.add_taper,
+        "add_ribs": generator.add_ribs,
+        "add_screw_holes": generator.add_screw_holes,
+    }
+
+
+def _resolve(connector):
+    """Returns (builder, features) for a connector type name or create_* method name
+
+    Features come from the connector type using the builder; the older
+    create_*_connector builders that no type uses implement all of them.
+    """
+    if connector in connector_registry.registry:
+        connector_type = connector_registry.get(connector)
+        return connector_type.builder, connector_type.features
+    if connector not in ENVELOPES:
+        raise ValueError(f"Unknown connector or builder: {connector}")
+    for connector_type in connector_registry.types():
+        if connector_type.builder == connector:
+            return connector, connector_type.features
+    return connector, frozenset(connector_registry.FEATURES)
+
+
+# Envelopes describe each builder's slot/wall layout analytically:
+#   clearance    - total play between board and slot
+#   walls        - (label, thickness) of every wall left around a slot
+#   taper_flare  - total slot widening at a tapered entrance
+#   rib          - thickness of the reinforcement ribs
+#   shortfall    - how far the slots stop short of the outer edge
+# Types whose builder has no envelope (e.g. plugins) skip these checks.
+
+def _standard_walls(g):
+    side = g.wall_thickness - g.tolerance / 2
+    return [("side wall", side), ("top/bottom wall", side)]
+
+
+def _end_to_end_envelope(g):
+    return {"clearance": g.tolerance, "walls": _standard_walls(g), "taper_flare": 1,
+            "rib": min(1.5, g.wall_thickness / 2), "shortfall": 0}
+
+
+def _angle_envelope(g):
+    # Channels are cut at the nominal board size, without tolerance
+    return {"clearance": 0, "walls": [("side wall", g.wall_thickness),
+                                      ("top/bottom wall", g.wall_thickness)],
+            "taper_flare": 2, "rib": min(1.5, g.wall_thickness / 2), "shortfall": 0}
+
+
+def _t_connector_envelope(g):
+    return dict(_end_to_end_envelope(g), taper_flare=1)
+
+
+def _cross_connector_envelope(g):
+    base_size = max(g.board_width, g.board_depth) * 2
+    slot_length = g.board_depth / 2
+    return {"clearance": g.tolerance, "walls": _standard_walls(g), "taper_flare": 2,
+            "rib": 2, "shortfall": (base_size - slot_length) / 2}
+
+
+def _single_slot_envelope(g):
+    return {"clearance": g.tolerance, "walls": _standard_walls(g), "taper_flare": 2,
+            "rib": min(1.5, g.wall_thickness / 2), "shortfall": 0}
+
+
+def _corner_envelope(g):
+    # The corner block is corner_size square in XY, so the slot's width has
+    # to fit inside the board thickness plus walls
+    corner_size = g.board_thickness + g.wall_thickness * 2
+    connector_width = g.board_width + g.wall_thickness * 2
+    return {"clearance": g.tolerance,
+            "walls": [("side wall", (corner_size - g.board_width - g.tolerance) / 2),
+                      ("top/bottom wall", (connector_width - g.board_thickness - g.tolerance) / 2)],
+            "taper_flare": 0, "rib": min(1.5, g.wall_thickness / 2), "shortfall": 0}
+
+
+ENVELOPES = {
+    "create_end_to_end_connector": _end_to_end_envelope,
+    "create_angle_connector": _angle_envelope,
+    "create_t_connector": _t_connector_envelope,
+    "create_cross_connector": _cross_connector_envelope,
+    "create_single_slot_segment": _single_slot_envelope,
+    "create_corner_segment": _corner_envelope,
+    "create_t_junction_segment": _single_slot_envelope,
+    "create_cross_junction_segment": _single_slot_envelope,
+}
+
+
+def check_parameters(generator, connector, result=None):
+    """Runs the analytic checks for a connector without building any geometry
+
+    Args:
+        generator: The ConnectorGenerator holding the parameters
+        connector: A connector type name or a create_* method name
+        result: Optional ValidationResult to add issues to
+
+    Returns:
+        The ValidationResult holding any issues found
+    """
+    builder, features = _resolve(connector)
+    if result is None:
+        result = ValidationResult(builder, _params(generator))
+    g = generator
+
+    for name in ("board_width", "board_thickness", "board_depth", "wall_thickness"):
+        if getattr(g, name) <= 0:
+            result.add("dimensions", ERROR, f"{name} must be positive")
+    if g.tolerance < 0:
+        result.add("dimensions", ERROR, "tolerance must not be negative")
+    if not result.ok:
+        return result
+
+    for feature in connector_registry.FEATURES:
+        if getattr(g, feature) and feature not in features:
+            result.add("features", WARNING, f"{builder} ignores {feature}")
+
+    if builder not in ENVELOPES:
+        return result
+    envelope = ENVELOPES[builder](g)
+
+    clearance = envelope["clearance"]
+    if clearance <= 0:
+        result.add("slot_clearance", ERROR,
+                   f"Slot has {clearance:g}mm clearance; the board will not fit")
+    elif clearance < MIN_CLEARANCE:
+        result.add("slot_clearance", WARNING,
+                   f"Slot clearance {clearance:g}mm is below {MIN_CLEARANCE:g}mm")
+
+    for label, thickness in envelope["walls"]:
+        if thickness <= 0:
+            result.add("wall", ERROR, f"Slot breaks through the {label}")
+        elif thickness < MIN_WALL:
+            result.add("wall", WARNING,
+                       f"{label.capitalize()} is {thickness:.2f}mm, below {MIN_WALL:g}mm")
+
+    if envelope["shortfall"] > 0:
+        result.add("slot_reach", ERROR,
+                   f"Slots stop {envelope['shortfall']:.2f}mm short of the outer edge")
+
+    if g.add_taper and "add_taper" in features:
+        entrance_wall = min(t for _, t in envelope["walls"]) - envelope["taper_flare"] / 2
+        if entrance_wall < MIN_WALL:
+            result.add("wall", WARNING,
+                       f"Wall at the tapered entrance is {entrance_wall:.2f}mm")
+
+    if g.add_ribs and "add_ribs" in features and envelope["rib"] < MIN_RIB:
+        result.add("ribs", WARNING,
+                   f"Ribs are {envelope['rib']:.2f}mm thick, below {MIN_RIB:g}mm")
+
+    if g.add_screw_holes and "add_screw_holes" in features:
+        if HOLE_DIAMETER > g.board_width + g.tolerance:
+            result.add("screw_holes", ERROR,
+                       f"{HOLE_DIAMETER}mm hole is wider than the slot and cuts the side walls")
+        elif HOLE_DIAMETER + 2 * MIN_WALL > g.board_width + 2 * g.wall_thickness:
+            result.add("screw_holes", WARNING, "Screw hole leaves less than the minimum wall")
+
+    return result
+
+
+# Nominal board positions for each builder as (center, size) boxes, used to
+# test that a board can actually be inserted into the finished part
+
+def _board_boxes(builder, g):
+    bw, bt, bd = g.board_width, g.board_thickness, g.board_depth
+    wall = g.wall_thickness
+    body_width = bw + wall * 2
+    body_height = bt + wall * 2
+
+    if builder == "create_end_to_end_connector":
+        return [((0, 0, 0), (bd * 2 + wall * 2, bw, bt))]
+    if builder == "create_single_slot_segment":
+        return [((0, 0, 0), (bd + wall * 2, bw, bt))]
+    if builder == "create_t_connector":
+        vertical_length = bd + wall * 2
+        return [((0, 0, 0), (bd * 2 + wall * 2, bw, bt)),
+                ((0, body_width / 2 + vertical_length / 2, 0), (bw, vertical_length, bt))]
+    if builder == "create_t_junction_segment":
+        body_depth = bd + wall * 2
+        return [((0, 0, 0), (body_depth * 2, bw, bt)),
+                ((0, body_width / 2 + body_depth / 2, 0), (bw, body_depth, bt))]
+    if builder == "create_cross_junction_segment":
+        junction_size = max(body_width, body_height) * 2
+        return [((0, 0, 0), (junction_size, bw, bt)),
+                ((0, 0, 0), (bw, junction_size, bt))]
+    if builder == "create_cross_connector":
+        return [((0, 0, 0), (bd / 2, bw, bt)),
+                ((0, 0, 0), (bw, bd / 2, bt))]
+    if builder == "create_corner_segment":
+        corner_size = bt + wall * 2
+        return [((corner_size / 4, 0, 0), (corner_size / 2, bw, bt)),
+                ((0, corner_size / 4, 0), (bw, corner_size / 2, bt))]
+    if builder == "create_angle_connector":
+        corner_size = body_height
+        return [((bd / 2 + corner_size, body_height / 2, body_width / 2), (bd, bt, bw)),
+                ((body_height / 2, bd / 2 + corner_size, body_width / 2), (bt, bd, bw))]
+    return []
+
+
+def check_geometry(generator, connector, result=None, shape=None):
+    """Builds the connector and checks it with the OCC kernel
+
+    Verifies the shape with BRepCheck, counts its solids and intersects it
+    with nominal boards placed in the slots to catch anything (ribs, walls)
+    that would stop a board from going in.
+    """
+    builder, _ = _resolve(connector)
+    if result is None:
+        result = ValidationResult(builder, _params(generator))
+    if shape is None:
+        if connector in connector_registry.registry:
+            shape = generator.create_connector(connector).val()
+        else:
+            shape = getattr(generator, builder)().val()
+
+    result.solid_valid = shape.isValid()
+    if not result.solid_valid:
+        result.add("brep", ERROR, "BRepCheck reports an invalid shape")
+
+    result.solid_count = len(shape.Solids())
+    if result.solid_count != 1:
+        result.add("brep", ERROR, f"Connector is made of {result.solid_count} separate solids")
+
+    interference = 0.0
+    for center, size in _board_boxes(builder, generator):
+        board = cq.Workplane("XY").box(*size).translate(center).val()
+        interference += shape.intersect(board).Volume()
+    result.interference = interference
+    if interference > INTERFERENCE_EPS:
+        result.add("interference", ERROR,
+                   f"Boards overlap the connector by {interference:.2f}mm^3")
+
+    return result
+
+
+def validate(generator, connector, deep=True, shape=None):
+    """Validates a connector, running the geometry stage only when needed
+
+    The analytic checks run first; the (much slower) geometry checks run
+    only if `deep` is set and the analytic stage found no errors. Pass an
+    already-built `shape` to check it instead of building the connector.
+    """
+    start = time.perf_counter()
+    result = check_parameters(generator, connector)
+    if deep and result.ok:
+        try:
+            check_geometry(generator, connector, result, shape)
+        except Exception as e:
+            result.add("build", ERROR, f"Failed to build connector: {str(e)}")
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def _validate_job(job):
+    connector, params, deep = job
+    return validate(ConnectorGenerator(**params), connector, deep)
+
+
+def validate_batch(jobs, deep=True, max_workers=None):
+    """Validates many connectors in parallel worker processes
+
+    Args:
+        jobs: Iterable of (connector, params) pairs, where params are
+            ConnectorGenerator keyword arguments
+        deep: Whether to run the geometry stage for jobs that pass analytically
+        max_workers: Worker process count (defaults to the CPU count)
+
+    Returns:
+        A list of ValidationResult in the same order as `jobs`
+    """
+    jobs = [(connector, dict(params), deep) for connector, params in jobs]
+    if max_workers == 1 or len(jobs) <= 1:
+        return [_validate_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_validate_job, jobs))
+
+
+def main(argv=None):
+    import argparse
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description="Check connectors for fit and validity")
+    parser.add_argument("--width", type=float, default=100)
+    parser.add_argument("--thickness", type=float, default=10)
+    parser.add_argument("--depth", type=float, default=50)
+    parser.add_argument("--wall", type=float, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--taper", action="store_true")
+    parser.add_argument("--ribs", action="store_true")
+    parser.add_argument("--screw-holes", action="store_true")
+    parser.add_argument("--builder", action="append",
+                        help="Connector type or builder to check (default: all builders)")
+    parser.add_argument("--quick", action="store_true", help="Only run the analytic checks")
+    args = parser.parse_args(argv)
+
+    params = {
+        "board_width": args.width,
+        "board_thickness": args.thickness,
+        "board_depth": args.depth,
+        "wall_thickness": args.wall,
+        "tolerance": args.tolerance,
+        "add_taper": args.taper,
+        "add_ribs": args.ribs,
+        "add_screw_holes": args.screw_holes,
+    }
+    builders = args.builder or list(ENVELOPES)
+    results = validate_batch([(b, params) for b in builders], deep=not args.quick)
+    for result in results:
+        sys.stdout.write(json.dumps(result.to_dict()) + "\n")
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())